@@ -1,10 +1,25 @@
 from django.contrib import admin
 
-from .models import Comment, Group, Post
+from . import exporter
+from .models import Comment, Follow, Group, Post, Task
+
+
+def export_posts(modeladmin, request, queryset):
+    comments = Comment.objects.filter(post__in=queryset.values('id'))
+    return exporter.streaming_response(
+        exporter.rows(*exporter.with_references(
+            queryset, comments, Follow.objects.none())),
+        'jsonl', 'posts')
+
+
+export_posts.short_description = 'Выгрузить с комментариями в JSONL'
 
 
 class PostAdmin(admin.ModelAdmin):
-    list_display = ('text', 'pub_date', 'author')
+    list_display = ('text', 'pub_date', 'author', 'image_original_size',
+                    'image_size')
+    readonly_fields = ('image_original_size', 'image_size')
+    actions = (export_posts,)
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
@@ -17,11 +32,26 @@ class GroupAdmin(admin.ModelAdmin):
 
 
 class CommentAdmin(admin.ModelAdmin):
-    list_display = ('post', 'author')
+    list_display = ('post', 'author', 'reply_count')
+    raw_id_fields = ('parent',)
     search_fields = ('text',)
     empty_value_display = '-пусто-'
 
+    def get_readonly_fields(self, request, obj=None):
+        # Путь ответов не пересчитывается при переносе ветки.
+        if obj is not None:
+            return ('parent',)
+        return ()
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'priority', 'run_at', 'attempts')
+    list_filter = ('status', 'name')
+    readonly_fields = ('last_error', 'locked_by', 'locked_at', 'created',
+                       'finished')
+
 
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Post, PostAdmin)
 admin.site.register(Comment, CommentAdmin)
+admin.site.register(Task, TaskAdmin)
@@ -0,0 +1,90 @@
+from django.core.files.storage import default_storage
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.http import urlencode
+from django.views.decorators.http import require_safe
+
+from . import caching, timeline
+from .models import Group, Post, User
+from .paginator import CursorPaginator
+from .routers import replica_reads
+from .views import POSTS_PER_PAGE
+
+FIELDS = ('id', 'text', 'pub_date', 'author__username', 'group__slug',
+          'image', 'comment_count')
+
+
+def serialize(row):
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'pub_date': row['pub_date'].isoformat(),
+        'author': row['author__username'],
+        'group': row['group__slug'],
+        'image': default_storage.url(row['image']) if row['image'] else None,
+        'comments': row['comment_count'],
+    }
+
+
+def _link(request, cursor):
+    if not cursor:
+        return None
+    return request.build_absolute_uri(
+        request.path + '?' + urlencode({'cursor': cursor}))
+
+
+def feed_response(request, queryset, scopes, ordering=('-pub_date', '-id')):
+    """Страница ленты в JSON. Посты выбираются через values(), без
+    создания моделей; если у клиента актуальная версия, возвращается 304
+    и выборки нет вовсе."""
+    cursor = request.GET.get('cursor', '')
+    etag = caching.validator(
+        caching.newest(queryset, ordering[0].lstrip('-')), scopes,
+        request.path, cursor)
+
+    def render():
+        page = CursorPaginator(
+            queryset.for_feed().values(*FIELDS), POSTS_PER_PAGE, ordering
+        ).get_page(cursor)
+        return JsonResponse({
+            'results': [serialize(row) for row in page],
+            'next': _link(request, page.next_cursor),
+            'previous': _link(request, page.previous_cursor),
+        })
+
+    return caching.conditional(request, etag, render)
+
+
+@require_safe
+@replica_reads
+def posts(request):
+    return feed_response(request, Post.objects.all(), ('global',))
+
+
+@require_safe
+@replica_reads
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return feed_response(request, group.posts.all(),
+                         (f'group:{group.id}',))
+
+
+@require_safe
+@replica_reads
+def profile(request, username):
+    user = get_object_or_404(User, username=username)
+    return feed_response(request, user.posts.all(),
+                         (f'author:{user.id}',))
+
+
+@require_safe
+@replica_reads
+def follow(request):
+    if not request.user.is_authenticated:
+        return JsonResponse({'detail': 'Требуется авторизация'}, status=401)
+    queryset, ordering = timeline.feed(request.user)
+    response = feed_response(
+        request, queryset, timeline.feed_scopes(request.user.id), ordering)
+    response['Cache-Control'] = 'private'
+    response['Vary'] = 'Cookie'
+    return response
@@ -1,5 +1,12 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from . import signals, tasks  # noqa: F401
+        if settings.TEMPLATE_WARMUP:
+            from . import templating
+            templating.warm_up()
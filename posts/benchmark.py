@@ -0,0 +1,322 @@
+"""Нагрузочные сценарии для горячих путей: наполнение базы данными со
+степенным распределением и прогон представлений через тестовый клиент.
+
+Запуск — команда benchmark, она создаёт отдельную тестовую базу.
+"""
+import asyncio
+import copy
+import itertools
+import math
+import random
+import statistics
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection
+from django.db.models import Count
+from django.template import RequestContext, engines
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from yatube.handlers import ASGIHandler
+
+from . import search, stats, threads, timeline
+from .models import Comment, Follow, Group, Post, User
+from .paginator import CursorPaginator
+
+WORDS = ('утро', 'город', 'кофе', 'река', 'книга', 'поезд', 'море', 'лес',
+         'дождь', 'кот', 'музыка', 'друг', 'работа', 'снег', 'вечер',
+         'дорога', 'окно', 'сад', 'песня', 'небо')
+
+
+def _weights(count, alpha):
+    # Закон Ципфа: k-й по популярности получает вес 1 / k ** alpha.
+    return [1 / (rank ** alpha) for rank in range(1, count + 1)]
+
+
+def seed(users=200, groups=10, posts=2000, comments=4000, follows=20,
+         alpha=1.2, random_seed=1):
+    """Заполняет базу: авторы постов, группы, комментаторы и цели подписок
+    выбираются со степенным распределением, поэтому есть и «звёзды» с
+    тысячами подписчиков, и длинный хвост. Сигналы при bulk_create не
+    срабатывают, поэтому пути комментариев, счётчики, ленты и поиск
+    пересчитываются отдельно."""
+    rnd = random.Random(random_seed)
+    User.objects.bulk_create(
+        [User(username=f'bench{i}') for i in range(users)])
+    people = list(User.objects.filter(username__startswith='bench')
+                  .order_by('id'))
+    user_weights = _weights(len(people), alpha)
+    Group.objects.bulk_create(
+        [Group(title=f'Группа {i}', slug=f'bench-{i}', description='')
+         for i in range(groups)])
+    group_list = list(Group.objects.filter(slug__startswith='bench-')
+                      .order_by('id'))
+    group_weights = _weights(len(group_list), alpha)
+
+    authors = rnd.choices(people, user_weights, k=posts)
+    Post.objects.bulk_create(
+        [Post(text=f'Пост {i} ' + ' '.join(rnd.sample(WORDS, 8)),
+              author=author,
+              group=(rnd.choices(group_list, group_weights)[0]
+                     if group_list and rnd.random() < 0.7 else None))
+         for i, author in enumerate(authors)])
+    post_ids = list(Post.objects.order_by('id').values_list('id', flat=True))
+    post_weights = _weights(len(post_ids), alpha)
+    rnd.shuffle(post_weights)
+    Comment.objects.bulk_create(
+        [Comment(post_id=post_id, author=rnd.choice(people),
+                 text=f'Комментарий {i}')
+         for i, post_id in enumerate(
+             rnd.choices(post_ids, post_weights, k=comments))])
+    threads.number_roots()
+
+    # Число подписок тоже степенное; среднее paretovariate(alpha) равно
+    # alpha / (alpha - 1), масштабируем его к follows.
+    scale = follows * (alpha - 1) / alpha
+    pairs = set()
+    for user in people:
+        count = min(len(people) - 1,
+                    math.ceil(rnd.paretovariate(alpha) * scale))
+        for author in rnd.choices(people, user_weights, k=count):
+            if author != user:
+                pairs.add((user.id, author.id))
+    Follow.objects.bulk_create(
+        [Follow(user_id=user_id, author_id=author_id)
+         for user_id, author_id in pairs])
+
+    stats.reconcile()
+    for user_id, author_id in pairs:
+        timeline.backfill(user_id, author_id)
+    search.rebuild()
+    return {
+        'users': users, 'groups': groups, 'posts': posts,
+        'comments': comments, 'follows': len(pairs), 'alpha': alpha,
+        'seed': random_seed,
+    }
+
+
+class Scenario:
+    """Один горячий путь. prepare() вызывается вне замера перед каждым
+    запросом и возвращает (method, url, data)."""
+
+    def __init__(self, name, prepare, login=True):
+        self.name = name
+        self.prepare = prepare
+        self.login = login
+
+
+def scenarios():
+    """Сценарии на данных seed(): самые популярные автор, группа и пост,
+    читатель с самой большой лентой подписок."""
+    star = User.objects.order_by('-stats__followers', 'id').first()
+    reader = User.objects.order_by('-stats__following', 'id').first()
+    group = Group.objects.annotate(
+        total=Count('posts')).order_by('-total', 'id').first()
+    post = star.posts.order_by('-pub_date', '-id').first()
+    post_kwargs = {'username': star.username, 'post_id': post.id}
+    targets = itertools.cycle(
+        User.objects.exclude(pk=reader.pk)
+        .order_by('-stats__followers', 'id')[:10])
+
+    def get(url):
+        return lambda: ('get', url, None)
+
+    def follow():
+        # Снимаем подписку вне замера, чтобы каждый запрос её создавал
+        # и заполнял ленту.
+        author = next(targets)
+        Follow.objects.filter(user=reader, author=author).delete()
+        return 'get', reverse('profile_follow', kwargs={
+            'username': author.username}), None
+
+    return reader, [
+        Scenario('index', get(reverse('index')), login=False),
+        Scenario('group_posts', get(reverse('group', kwargs={
+            'slug': group.slug})), login=False),
+        Scenario('profile', get(reverse('profile', kwargs={
+            'username': star.username})), login=False),
+        Scenario('post_view', get(reverse('post', kwargs=post_kwargs)),
+                 login=False),
+        Scenario('follow_index', get(reverse('follow_index'))),
+        Scenario('add_comment', lambda: (
+            'post', reverse('add_comment', kwargs=post_kwargs),
+            {'text': 'Комментарий из бенчмарка'})),
+        Scenario('profile_follow', follow),
+    ]
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = max(0, math.ceil(percent / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def _clear_caches():
+    for alias in settings.CACHES:
+        caches[alias].clear()
+
+
+def measure(scenario, client, iterations, warmup):
+    _clear_caches()
+    timings, queries = [], []
+    for i in range(warmup + iterations):
+        method, url, data = scenario.prepare()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = getattr(client, method)(url, data)
+            elapsed = time.perf_counter() - started
+        if response.status_code >= 400:
+            raise RuntimeError(
+                f'{scenario.name}: {url} вернул {response.status_code}')
+        if i >= warmup:
+            timings.append(elapsed * 1000)
+            queries.append(len(captured))
+
+    # Память считаем отдельным прогоном: tracemalloc замедляет код и
+    # исказил бы задержки.
+    method, url, data = scenario.prepare()
+    tracemalloc.start()
+    try:
+        getattr(client, method)(url, data)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'iterations': iterations,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p90_ms': round(percentile(timings, 90), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'mean_ms': round(statistics.mean(timings), 3),
+        'queries': max(queries),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+class _Uncached:
+    # Подменяет FeedFragment: лента всегда рендерится заново.
+    def get(self):
+        return None
+
+    def set(self, html):
+        pass
+
+
+def _engine(cached):
+    engine = copy.copy(engines['django'].engine)
+    engine.__dict__.pop('template_loaders', None)
+    engine.loaders = ([('django.template.loaders.cached.Loader',
+                        settings.TEMPLATE_LOADERS)]
+                      if cached else list(settings.TEMPLATE_LOADERS))
+    return engine
+
+
+def template_render(iterations=50):
+    """Время рендера страницы ленты (index.html с десятью постами) без
+    кэша шаблонов и с кэширующим загрузчиком."""
+    page = CursorPaginator(Post.objects.for_feed(), 10).get_page()
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    context = {'page': page, 'paginator': page.paginator,
+               'feed': _Uncached()}
+    results = {}
+    for name, cached in (('uncached', False), ('cached', True)):
+        engine = _engine(cached)
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            engine.get_template('index.html').render(
+                RequestContext(request, context))
+            timings.append((time.perf_counter() - started) * 1000)
+        results[name] = {
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p90_ms': round(percentile(timings, 90), 3),
+            'mean_ms': round(statistics.mean(timings), 3),
+        }
+    results['speedup'] = round(
+        results['uncached']['mean_ms'] / results['cached']['mean_ms'], 2)
+    return results
+
+
+def run(iterations=50, warmup=5, only=None):
+    reader, items = scenarios()
+    guest = Client()
+    member = Client()
+    member.force_login(reader)
+    return {
+        scenario.name: measure(scenario, member if scenario.login else guest,
+                               iterations, warmup)
+        for scenario in items
+        if not only or scenario.name in only
+    }
+
+
+def slow_clients(url, clients=100, workers=8, delay=0.2):
+    """Пропускная способность при медленных клиентах: каждый клиент
+    delay секунд отправляет запрос и столько же читает ответ. WSGI-воркер
+    занят клиентом всё это время, ASGI держит поток только пока работает
+    представление. Потоков в обоих случаях workers."""
+    environ = RequestFactory().get(url).environ
+    statuses = []
+
+    def wsgi_client(handler):
+        time.sleep(delay)
+        response = handler(dict(environ), lambda status, headers: None)
+        b''.join(response)
+        response.close()
+        statuses.append(response.status_code)
+        time.sleep(delay)
+
+    async def asgi_client(handler):
+        scope = {'type': 'http', 'method': 'GET', 'path': url,
+                 'query_string': b'', 'headers': [(b'host', b'testserver')],
+                 'server': ('testserver', 80)}
+
+        async def receive():
+            await asyncio.sleep(delay)
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                statuses.append(message['status'])
+            elif not message.get('more_body'):
+                await asyncio.sleep(delay)
+
+        await handler(scope, receive, send)
+
+    async def asgi_run(handler):
+        await asyncio.gather(*(asgi_client(handler) for _ in range(clients)))
+
+    results = {}
+    started = time.perf_counter()
+    handler = WSGIHandler()
+    with ThreadPoolExecutor(workers) as pool:
+        for future in [pool.submit(wsgi_client, handler)
+                       for _ in range(clients)]:
+            future.result()
+    results['wsgi'] = time.perf_counter() - started
+
+    handler = ASGIHandler(workers)
+    started = time.perf_counter()
+    asyncio.run(asgi_run(handler))
+    results['asgi'] = time.perf_counter() - started
+    handler.executor.shutdown()
+
+    failed = [status for status in statuses if status >= 400]
+    if failed:
+        raise RuntimeError(f'{url} вернул {failed[0]}')
+    report = {
+        name: {'seconds': round(elapsed, 3),
+               'requests_per_second': round(clients / elapsed, 1)}
+        for name, elapsed in results.items()
+    }
+    report.update(clients=clients, workers=workers, delay=delay,
+                  speedup=round(results['wsgi'] / results['asgi'], 2))
+    return report
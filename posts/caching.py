@@ -0,0 +1,171 @@
+import hashlib
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Max
+from django.utils.cache import get_conditional_response
+from django.utils.functional import cached_property
+from django.utils.http import quote_etag
+
+from . import metrics, routers
+
+GENERATION_KEY = 'feed:gen:{}'
+RECENT_KEY = 'feed:recent:{}'
+STATS_KEY = 'feed:stats:{}'
+
+
+def _cache():
+    return caches[settings.FEED_CACHE_ALIAS]
+
+
+def _counters():
+    return caches[settings.FEED_COUNTERS_ALIAS]
+
+
+def _fresh_generation():
+    # Счётчик, вытесненный из кэша, не должен начаться заново с
+    # уже использованного значения, поэтому стартуем со времени.
+    return time.time_ns()
+
+
+def bump(*scopes, using=None):
+    """Внутри транзакции поколения сдвигаются сразу, чтобы сама
+    транзакция не читала старый кэш, и ещё раз после фиксации: читатель
+    другого соединения мог между сдвигами закэшировать страницу по
+    старому снимку базы, и этот ключ должен устареть."""
+    _bump(scopes)
+    if transaction.get_connection(using).in_atomic_block:
+        transaction.on_commit(partial(_bump, scopes), using=using)
+
+
+def _bump(scopes):
+    cache = _counters()
+    for scope in scopes:
+        key = GENERATION_KEY.format(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _fresh_generation(), None)
+    if settings.DATABASE_REPLICAS:
+        # Пока реплика может отставать, ленты с неё не кэшируются.
+        cache.set_many({RECENT_KEY.format(scope): 1 for scope in scopes},
+                       settings.REPLICA_PIN_SECONDS)
+
+
+def generations(scopes):
+    cache = _counters()
+    keys = [GENERATION_KEY.format(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, _fresh_generation(), None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def _record(outcome):
+    metrics.cache_event(outcome)
+    cache = _counters()
+    key = STATS_KEY.format(outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+
+
+def stats():
+    found = _counters().get_many([STATS_KEY.format('hits'),
+                                  STATS_KEY.format('misses')])
+    hits = found.get(STATS_KEY.format('hits'), 0)
+    misses = found.get(STATS_KEY.format('misses'), 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+    }
+
+
+class FeedFragment:
+    """Закэшированная разметка ленты.
+
+    Ключ содержит поколения всех областей, от которых зависит лента
+    (global, group:<id>, author:<id>, follow:<user_id>); сигналы
+    увеличивают поколение, и старые записи просто перестают читаться.
+    Анонимные посетители делят одну запись, авторизованным нужна своя —
+    в post_item.html есть кнопка редактирования для автора.
+
+    Разметка, прочитанная с реплики в первые REPLICA_PIN_SECONDS после
+    сдвига поколения, не сохраняется: реплика могла ещё не получить
+    запись, и старые данные легли бы под новый ключ.
+    """
+
+    def __init__(self, feed, scopes, request, cursor=''):
+        self.feed = feed
+        self.scopes = scopes
+        self.viewer = (request.user.pk if request.user.is_authenticated
+                       else 'anon')
+        self.cursor = cursor
+        self.cursors = ('', '')
+        self.timeout = settings.FEED_CACHE_TIMEOUTS[feed]
+
+    @cached_property
+    def key(self):
+        version = '.'.join(str(gen) for gen in generations(self.scopes))
+        cursor = hashlib.md5(self.cursor.encode()).hexdigest()
+        return f'feed:{self.feed}:{version}:{self.viewer}:{cursor}'
+
+    def get(self):
+        """Запись читается один раз за запрос: представление проверяет её
+        до выборки страницы, шаблон берёт уже прочитанную. Вместе с
+        разметкой хранятся курсоры соседних страниц (cursors)."""
+        if not hasattr(self, '_html'):
+            entry = _cache().get(self.key)
+            if isinstance(entry, tuple):
+                self._html, self.cursors = entry
+            else:
+                self._html = None
+            _record('misses' if self._html is None else 'hits')
+        return self._html
+
+    def set(self, html):
+        self._html = html
+        if routers.reading_replica() and _counters().get_many(
+                [RECENT_KEY.format(scope) for scope in self.scopes]):
+            return
+        _cache().set(self.key, (html, self.cursors), self.timeout)
+
+
+def newest(queryset, field):
+    """Время самой новой записи одним агрегатным запросом."""
+    return queryset.order_by().aggregate(newest=Max(field))['newest']
+
+
+def validator(last_modified, scopes, *parts):
+    """ETag страницы без выборки её содержимого.
+
+    Время самой новой записи правки и удаления не сдвигают, поэтому в
+    ETag входят ещё поколения областей ленты и части запроса (путь,
+    курсор, зритель). Last-Modified по той же причине не отдаём: общий
+    кэш, проверяющий только If-Modified-Since, получил бы 304 на
+    устаревшую страницу.
+    """
+    version = [str(gen) for gen in generations(scopes)]
+    version.extend(str(part) for part in parts)
+    version.append(last_modified.isoformat() if last_modified else '')
+    return hashlib.md5('|'.join(version).encode()).hexdigest()
+
+
+def conditional(request, etag, render):
+    """Отвечает 304, если у клиента актуальная версия, иначе вызывает
+    render() и проставляет ETag в ответ."""
+    etag = quote_etag(etag)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = render()
+    if request.method in ('GET', 'HEAD'):
+        response['ETag'] = etag
+    return response
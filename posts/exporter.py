@@ -0,0 +1,148 @@
+"""Потоковая выгрузка постов, комментариев и подписок в JSONL или CSV.
+
+Строки читаются через values().iterator(chunk_size=...) и сразу
+сериализуются, поэтому память не растёт с размером таблиц. Формат
+совпадает с тем, что читает import_posts: впереди идут пользователи и
+группы, на которые ссылаются выгруженные строки, а комментарии сохраняют
+id и parent, так что выгрузка загружается и в пустую базу вместе с
+ветками.
+"""
+import csv
+import json
+from itertools import chain
+
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+
+from .models import Comment, Follow, Group, Post, User
+
+CHUNK_SIZE = 2000
+KINDS = ('user', 'group', 'post', 'comment', 'follow')
+COLUMNS = ('type', 'id', 'username', 'slug', 'title', 'description', 'post',
+           'parent', 'user', 'author', 'group', 'text', 'pub_date',
+           'created')
+CONTENT_TYPES = {'jsonl': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+def user_rows(users):
+    values = users.order_by('id').values_list('username', flat=True)
+    for username in values.iterator(chunk_size=CHUNK_SIZE):
+        yield {'type': 'user', 'username': username}
+
+
+def group_rows(groups):
+    values = groups.order_by('id').values_list('slug', 'title',
+                                               'description')
+    for slug, title, description in values.iterator(chunk_size=CHUNK_SIZE):
+        yield {'type': 'group', 'slug': slug, 'title': title,
+               'description': description}
+
+
+def post_rows(posts):
+    values = posts.order_by('id').values_list(
+        'id', 'author__username', 'group__slug', 'text', 'pub_date')
+    for post_id, author, group, text, pub_date in values.iterator(
+            chunk_size=CHUNK_SIZE):
+        yield {'type': 'post', 'id': post_id, 'author': author,
+               'group': group, 'text': text,
+               'pub_date': pub_date.isoformat()}
+
+
+def comment_rows(comments):
+    # Родитель создан раньше ответа, поэтому по id он идёт первым.
+    values = comments.order_by('id').values_list(
+        'id', 'post_id', 'parent_id', 'author__username', 'text', 'created')
+    for comment_id, post_id, parent_id, author, text, created in (
+            values.iterator(chunk_size=CHUNK_SIZE)):
+        yield {'type': 'comment', 'id': comment_id, 'post': post_id,
+               'parent': parent_id, 'author': author, 'text': text,
+               'created': created.isoformat()}
+
+
+def follow_rows(follows):
+    values = follows.order_by('id').values_list('user__username',
+                                                'author__username')
+    for user, author in values.iterator(chunk_size=CHUNK_SIZE):
+        yield {'type': 'follow', 'user': user, 'author': author}
+
+
+def rows(users=None, groups=None, posts=None, comments=None, follows=None):
+    parts = []
+    if users is not None:
+        parts.append(user_rows(users))
+    if groups is not None:
+        parts.append(group_rows(groups))
+    if posts is not None:
+        parts.append(post_rows(posts))
+    if comments is not None:
+        parts.append(comment_rows(comments))
+    if follows is not None:
+        parts.append(follow_rows(follows))
+    return chain.from_iterable(parts)
+
+
+def querysets(author=None, group=None, since=None, until=None):
+    """Посты по фильтрам, комментарии к ним и подписки автора (все
+    подписки, если автор не задан)."""
+    posts = Post.objects.all()
+    follows = Follow.objects.all()
+    if author:
+        posts = posts.filter(author__username=author)
+        follows = follows.filter(Q(user__username=author) |
+                                 Q(author__username=author))
+    if group:
+        posts = posts.filter(group__slug=group)
+    if since:
+        posts = posts.filter(pub_date__gte=since)
+    if until:
+        posts = posts.filter(pub_date__lt=until)
+    comments = Comment.objects.filter(post__in=posts.values('id'))
+    return posts, comments, follows
+
+
+def with_references(posts, comments, follows):
+    """Добавляет к выгрузке пользователей и группы, на которые ссылаются
+    её строки. Возвращает querysets в порядке KINDS."""
+    users = User.objects.filter(
+        Q(id__in=posts.values('author_id')) |
+        Q(id__in=comments.values('author_id')) |
+        Q(id__in=follows.values('user_id')) |
+        Q(id__in=follows.values('author_id')))
+    groups = Group.objects.filter(id__in=posts.values('group_id'))
+    return users, groups, posts, comments, follows
+
+
+def user_querysets(user):
+    """Всё, что пользователь создал сам: посты, комментарии, подписки, и
+    те, на кого они ссылаются."""
+    return with_references(user.posts.all(), user.comments.all(),
+                           Follow.objects.filter(user=user))
+
+
+class _Echo:
+    # csv.writer пишет в объект с write(); отдаём строку обратно.
+    def write(self, value):
+        return value
+
+
+def to_jsonl(items):
+    for item in items:
+        yield json.dumps(item, ensure_ascii=False) + '\n'
+
+
+def to_csv(items):
+    writer = csv.DictWriter(_Echo(), COLUMNS)
+    yield writer.writeheader()
+    for item in items:
+        yield writer.writerow(item)
+
+
+WRITERS = {'jsonl': to_jsonl, 'csv': to_csv}
+
+
+def streaming_response(items, file_format, filename):
+    response = StreamingHttpResponse(WRITERS[file_format](items),
+                                     content_type=CONTENT_TYPES[file_format])
+    response['Content-Disposition'] = (
+        f'attachment; filename="{filename}.{file_format}"')
+    return response
@@ -1,5 +1,8 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
+from PIL import Image
 
+from . import images
 from .models import Comment, Post
 
 
@@ -8,6 +11,23 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if isinstance(image, UploadedFile):
+            try:
+                normalized = images.normalize(image)
+            except (OSError, KeyError, Image.DecompressionBombError):
+                # KeyError — в сборке Pillow нет даже кодировщика JPEG.
+                raise forms.ValidationError(
+                    'Не удалось обработать изображение')
+            self.instance.image_original_size = image.size
+            self.instance.image_size = normalized.size
+            return normalized
+        if not image:
+            self.instance.image_original_size = None
+            self.instance.image_size = None
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,37 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+
+from . import caching
+
+
+def check_cache(alias):
+    cache = caches[alias]
+    key = f'health:{uuid.uuid4().hex}'
+    started = time.perf_counter()
+    try:
+        cache.set(key, 1, 10)
+        ok = cache.get(key) == 1
+        cache.delete(key)
+        error = None
+    except Exception as exc:
+        ok, error = False, str(exc)
+    return {
+        'backend': f'{type(cache).__module__}.{type(cache).__name__}',
+        'ok': ok,
+        'latency_ms': round((time.perf_counter() - started) * 1000, 3),
+        'error': error,
+    }
+
+
+def cache_health(request):
+    checks = {alias: check_cache(alias) for alias in settings.CACHES}
+    healthy = all(check['ok'] for check in checks.values())
+    data = {'status': 'ok' if healthy else 'error'}
+    if request.user.is_staff:
+        data['caches'] = checks
+        data['feed_cache'] = caching.stats()
+    return JsonResponse(data, status=200 if healthy else 503)
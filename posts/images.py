@@ -0,0 +1,61 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from PIL import Image, ImageOps
+
+EXTENSIONS = {'WEBP': '.webp', 'JPEG': '.jpg'}
+
+
+def output_format():
+    """IMAGE_FORMAT, если Pillow собран с его кодировщиком, иначе JPEG:
+    без libwebp сохранение в WEBP падает с KeyError."""
+    Image.init()
+    if settings.IMAGE_FORMAT in Image.SAVE:
+        return settings.IMAGE_FORMAT
+    return 'JPEG'
+
+
+def _convert(image, image_format):
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        # У JPEG нет прозрачности: подкладываем белый фон.
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    if image.mode not in ('RGB', 'RGBA', 'L'):
+        return image.convert('RGBA' if 'transparency' in image.info
+                             else 'RGB')
+    return image
+
+
+def normalize(upload):
+    """Уменьшает загруженную картинку до IMAGE_MAX_SIZE, пережимает в
+    IMAGE_FORMAT (см. output_format) и отбрасывает EXIF. Большой
+    результат пишется во временный файл на диске, а не держится в
+    памяти."""
+    image_format = output_format()
+    max_size = tuple(settings.IMAGE_MAX_SIZE)
+    upload.seek(0)
+    with Image.open(upload) as source:
+        # JPEG умеет декодироваться сразу в уменьшенном масштабе.
+        source.draft('RGB', max_size)
+        image = ImageOps.exif_transpose(source)
+        image.thumbnail(max_size, Image.LANCZOS)
+        image = _convert(image, image_format)
+
+    name = os.path.splitext(os.path.basename(upload.name))[0]
+    result = File(tempfile.SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE,
+        dir=settings.FILE_UPLOAD_TEMP_DIR,
+    ), name=name + EXTENSIONS[image_format])
+    options = {'quality': settings.IMAGE_QUALITY, 'optimize': True}
+    if image_format == 'JPEG':
+        options['progressive'] = True
+    else:
+        options['method'] = 6
+    image.save(result.file, image_format, **options)
+    result.size = result.tell()
+    result.seek(0)
+    return result
@@ -0,0 +1,292 @@
+"""Массовая загрузка пользователей, групп, постов, комментариев и подписок
+из JSONL или CSV.
+
+Строки читаются потоком и копятся по типам в пачки не больше batch_size;
+каждая пачка вставляется bulk_create в своей транзакции, поэтому память
+не зависит от размера файла. Имена пользователей и слаги групп
+разрешаются в id через словари в памяти. Сигналы при bulk_create не
+срабатывают, поэтому ленты, поиск, пути веток комментариев и их
+reply_count обновляются по пачкам, а счётчики и кэш лент — в finish().
+"""
+import csv
+import json
+from collections import Counter
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import F, Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import caching, search, stats, threads, timeline
+from .models import Comment, Follow, Group, Post, User
+from .signals import post_scopes
+
+KINDS = ('user', 'group', 'post', 'comment', 'follow')
+# Перед пачкой своего типа сбрасываются пачки, на которые она ссылается.
+DEPENDENCIES = {
+    'post': ('user', 'group'),
+    'comment': ('user', 'post'),
+    'follow': ('user',),
+}
+
+
+class InvalidRow(ValueError):
+    pass
+
+
+def read_jsonl(stream):
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_csv(stream):
+    yield from csv.DictReader(stream)
+
+
+READERS = {'jsonl': read_jsonl, 'csv': read_csv}
+
+
+def _int(row, key):
+    try:
+        return int(row[key])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _post_id(row):
+    return _int(row, 'post')
+
+
+def parse_date(value):
+    if not value:
+        return timezone.now()
+    date = parse_datetime(value)
+    if date is None:
+        raise InvalidRow(f'неверная дата: {value}')
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date, timezone.utc)
+    return date
+
+
+@contextmanager
+def explicit_dates():
+    """auto_now_add перезаписал бы даты из файла текущим временем."""
+    fields = [Post._meta.get_field('pub_date'),
+              Comment._meta.get_field('created')]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Importer:
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.users = dict(User.objects.values_list('username', 'id'))
+        self.groups = dict(Group.objects.values_list('slug', 'id'))
+        # На SQLite bulk_create не возвращает id, поэтому id постов без
+        # явного id назначаем сами — на них ссылаются комментарии.
+        self.next_post_id = (
+            Post.objects.aggregate(top=Max('id'))['top'] or 0) + 1
+        # Пути веток строятся из id, поэтому id комментариев тоже свои.
+        self.next_comment_id = (
+            Comment.objects.aggregate(top=Max('id'))['top'] or 0) + 1
+        self.pending = {kind: [] for kind in KINDS}
+        self.created = dict.fromkeys(KINDS, 0)
+        self.skipped = dict.fromkeys(KINDS, 0)
+        self.scopes = {'global'}
+
+    def add(self, row, kind=None):
+        kind = kind or row.get('type')
+        if kind not in KINDS:
+            raise InvalidRow(f'неизвестный тип строки: {kind}')
+        self.pending[kind].append(row)
+        if len(self.pending[kind]) >= self.batch_size:
+            self.flush(kind)
+
+    def flush(self, kind):
+        for dependency in DEPENDENCIES.get(kind, ()):
+            self.flush(dependency)
+        rows, self.pending[kind] = self.pending[kind], []
+        if rows:
+            with explicit_dates(), transaction.atomic():
+                getattr(self, f'_insert_{kind}s')(rows)
+
+    def finish(self):
+        for kind in KINDS:
+            self.flush(kind)
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                    no_style(), [Post, Comment]):
+                cursor.execute(sql)
+        stats.reconcile()
+        caching.bump(*self.scopes)
+
+    def _user_id(self, username):
+        user_id = self.users.get(username)
+        if user_id is None:
+            raise InvalidRow(f'нет пользователя {username}')
+        return user_id
+
+    def _resolve(self, kind, rows, build):
+        objects = []
+        for row in rows:
+            try:
+                objects.append(build(row))
+            except (InvalidRow, KeyError, ValueError):
+                self.skipped[kind] += 1
+        return objects
+
+    def _require(self, kind, rows, key):
+        """Строки без обязательного поля key пропускаются."""
+        def build(row):
+            if not row.get(key):
+                raise InvalidRow(f'нет поля {key}')
+            return row
+        return self._resolve(kind, rows, build)
+
+    def _insert_users(self, rows):
+        valid = self._require('user', rows, 'username')
+        names = {row['username'] for row in valid} - set(self.users)
+        self.skipped['user'] += len(valid) - len(names)
+        User.objects.bulk_create([
+            User(username=name, password=make_password(None))
+            for name in names
+        ], ignore_conflicts=True)
+        self.users.update(User.objects.filter(
+            username__in=names).values_list('username', 'id'))
+        self.created['user'] += len(names)
+
+    def _insert_groups(self, rows):
+        valid = self._require('group', rows, 'slug')
+        new = {row['slug']: row for row in valid
+               if row['slug'] not in self.groups}
+        self.skipped['group'] += len(valid) - len(new)
+        Group.objects.bulk_create([
+            Group(slug=slug, title=row.get('title') or slug,
+                  description=row.get('description') or '')
+            for slug, row in new.items()
+        ], ignore_conflicts=True)
+        self.groups.update(Group.objects.filter(
+            slug__in=new).values_list('slug', 'id'))
+        self.created['group'] += len(new)
+
+    def _build_post(self, row):
+        group_id = None
+        if row.get('group'):
+            group_id = self.groups.get(row['group'])
+            if group_id is None:
+                raise InvalidRow(f'нет группы {row["group"]}')
+        if row.get('id'):
+            post_id = int(row['id'])
+        else:
+            post_id = self.next_post_id
+        self.next_post_id = max(self.next_post_id, post_id + 1)
+        return Post(id=post_id, text=row['text'],
+                    author_id=self._user_id(row['author']),
+                    group_id=group_id,
+                    pub_date=parse_date(row.get('pub_date')))
+
+    def _insert_posts(self, rows):
+        resolved = self._resolve('post', rows, self._build_post)
+        posts = {post.id: post for post in resolved}
+        # Посты, чьи id уже заняты, не перезаписываем.
+        for post_id in Post.objects.filter(
+                id__in=list(posts)).values_list('id', flat=True):
+            del posts[post_id]
+        posts = list(posts.values())
+        Post.objects.bulk_create(posts)
+        # Неразобранные строки уже посчитал _resolve.
+        self.skipped['post'] += len(resolved) - len(posts)
+        self.created['post'] += len(posts)
+        timeline.fan_out_batch(posts)
+        search.reindex(
+            Post.objects.filter(id__in=[post.id for post in posts]))
+        for post in posts:
+            self.scopes.update(post_scopes(post))
+
+    def _insert_comments(self, rows):
+        targets = Post.objects.filter(
+            id__in={_post_id(row) for row in rows} - {None}
+        ).only('id', 'author', 'group').in_bulk()
+        parents = {
+            comment_id: (post_id, path)
+            for comment_id, post_id, path in Comment.objects.filter(
+                id__in={_int(row, 'parent') for row in rows} - {None}
+            ).values_list('id', 'post_id', 'path')
+        }
+        taken = set(Comment.objects.filter(
+            id__in={_int(row, 'id') for row in rows} - {None}
+        ).values_list('id', flat=True))
+
+        def build(row):
+            post = targets.get(_post_id(row))
+            if post is None:
+                raise InvalidRow(f'нет поста {row["post"]}')
+            comment_id = _int(row, 'id') or self.next_comment_id
+            if comment_id in taken:
+                # Комментарии, чьи id уже заняты, не перезаписываем.
+                raise InvalidRow(f'комментарий {comment_id} уже есть')
+            path = threads.segment(comment_id)
+            parent_id = _int(row, 'parent')
+            if parent_id is not None:
+                parent_post, parent_path = parents.get(parent_id,
+                                                       (None, ''))
+                if parent_post != post.id:
+                    raise InvalidRow(f'нет комментария {parent_id} '
+                                     f'к посту {post.id}')
+                path = parent_path + path
+            comment = Comment(id=comment_id, post=post, text=row['text'],
+                              author_id=self._user_id(row['author']),
+                              parent_id=parent_id, path=path,
+                              created=parse_date(row.get('created')))
+            if len(path) > Comment._meta.get_field('path').max_length:
+                raise InvalidRow(f'слишком глубокий ответ {comment_id}')
+            self.next_comment_id = max(self.next_comment_id, comment_id + 1)
+            # Ответы из той же пачки могут ссылаться на этот комментарий.
+            parents[comment_id] = (post.id, path)
+            taken.add(comment_id)
+            self.scopes.update(post_scopes(post))
+            return comment
+
+        comments = self._resolve('comment', rows, build)
+        Comment.objects.bulk_create(comments)
+        self.created['comment'] += len(comments)
+        # reply_count предков, как его ведёт threads.place.
+        replies = Counter(ancestor for comment in comments
+                          for ancestor in threads.ancestor_ids(comment.path))
+        by_count = {}
+        for ancestor, count in replies.items():
+            by_count.setdefault(count, []).append(ancestor)
+        for count, ancestors in by_count.items():
+            Comment.objects.filter(pk__in=ancestors).update(
+                reply_count=F('reply_count') + count)
+
+    def _insert_follows(self, rows):
+        def build(row):
+            user_id = self._user_id(row['user'])
+            author_id = self._user_id(row['author'])
+            if user_id == author_id:
+                raise InvalidRow('подписка на себя')
+            return Follow(user_id=user_id, author_id=author_id)
+
+        follows = self._resolve('follow', rows, build)
+        # ignore_conflicts молча отбрасывает существующие подписки, поэтому
+        # созданные считаем по разнице до и после вставки.
+        existing = Follow.objects.filter(
+            user_id__in={follow.user_id for follow in follows})
+        before = existing.count()
+        Follow.objects.bulk_create(follows, ignore_conflicts=True)
+        inserted = existing.count() - before
+        self.created['follow'] += inserted
+        self.skipped['follow'] += len(follows) - inserted
+        for follow in follows:
+            timeline.backfill(follow.user_id, follow.author_id)
+            self.scopes.add(f'follow:{follow.user_id}')
@@ -0,0 +1,85 @@
+import json
+import platform
+import subprocess
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from posts import benchmark
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', 'HEAD'), capture_output=True, text=True,
+            check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = ('Замеряет горячие пути на сгенерированных данных в отдельной '
+            'тестовой базе и печатает результат в JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument('--comments', type=int, default=4000)
+        parser.add_argument('--follows', type=int, default=20,
+                            help='среднее число подписок пользователя')
+        parser.add_argument('--alpha', type=float, default=1.2,
+                            help='показатель степенного распределения')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--scenario', action='append', dest='only',
+                            help='запустить только этот сценарий')
+        parser.add_argument('--slow-clients', type=int, default=100,
+                            help='медленных клиентов для сравнения WSGI и '
+                                 'ASGI, 0 — не сравнивать')
+        parser.add_argument('--slow-delay', type=float, default=0.2,
+                            help='сколько секунд клиент отправляет запрос '
+                                 'и читает ответ')
+        parser.add_argument('--output', help='записать JSON в файл')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            dataset = benchmark.seed(
+                users=options['users'], groups=options['groups'],
+                posts=options['posts'], comments=options['comments'],
+                follows=options['follows'], alpha=options['alpha'],
+                random_seed=options['seed'])
+            results = benchmark.run(options['iterations'], options['warmup'],
+                                    options['only'])
+            templates = benchmark.template_render(options['iterations'])
+            slow = None
+            if options['slow_clients']:
+                slow = benchmark.slow_clients(
+                    reverse('index'), options['slow_clients'],
+                    settings.ASGI_THREADS or 1, options['slow_delay'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        report = json.dumps({
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'dataset': dataset,
+            'scenarios': results,
+            'templates': templates,
+            'slow_clients': slow,
+        }, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(report + '\n')
+        else:
+            self.stdout.write(report)
@@ -0,0 +1,77 @@
+import gzip
+import sys
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from posts import exporter
+
+TYPES = exporter.KINDS
+
+
+def date_argument(value):
+    date = parse_datetime(value)
+    if date is None:
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f'Неверная дата: {value}')
+        date = datetime.combine(day, time())
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date, timezone.utc)
+    return date
+
+
+class Command(BaseCommand):
+    help = ('Потоково выгружает посты, комментарии и подписки вместе с их '
+            'пользователями и группами в JSONL или CSV')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='-',
+                            help='файл; «-» — стандартный вывод')
+        parser.add_argument('--format', choices=sorted(exporter.WRITERS),
+                            help='по умолчанию — по расширению файла')
+        parser.add_argument('--gzip', action='store_true',
+                            help='сжать; включается и расширением .gz')
+        parser.add_argument('--author', help='имя пользователя')
+        parser.add_argument('--group', help='слаг группы')
+        parser.add_argument('--since', type=date_argument)
+        parser.add_argument('--until', type=date_argument)
+        parser.add_argument('--type', action='append', choices=TYPES,
+                            dest='types', help='выгружать только этот тип')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        compress = options['gzip'] or output.endswith('.gz')
+        name = output[:-3] if output.endswith('.gz') else output
+        file_format = options['format'] or (
+            'csv' if name.endswith('.csv') else 'jsonl')
+        types = options['types'] or TYPES
+        querysets = exporter.with_references(*exporter.querysets(
+            options['author'], options['group'], options['since'],
+            options['until']))
+        items = exporter.rows(*(
+            queryset if kind in types else None
+            for kind, queryset in zip(exporter.KINDS, querysets)))
+        chunks = exporter.WRITERS[file_format](items)
+        if output == '-' and not compress:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        if output == '-':
+            target = sys.stdout.buffer
+        elif compress:
+            target = open(output, 'wb')
+        else:
+            target = open(output, 'w', newline='', encoding='utf-8')
+        try:
+            if compress:
+                with gzip.open(target, 'wt', encoding='utf-8',
+                               newline='') as archive:
+                    archive.writelines(chunks)
+            else:
+                target.writelines(chunks)
+        finally:
+            if target is not sys.stdout.buffer:
+                target.close()
@@ -0,0 +1,43 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from posts import thumbnails
+from posts.models import Post
+
+
+def generate(post_id):
+    try:
+        return thumbnails.generate(post_id)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = 'Создаёт миниатюры для уже загруженных картинок'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--force', action='store_true',
+                            help='пересоздать и уже готовые миниатюры')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').exclude(image__isnull=True)
+        if not options['force']:
+            posts = posts.filter(thumbnails='')
+        post_ids = posts.values_list('id', flat=True).iterator()
+        if options['workers'] == 1:
+            done = sum(map(thumbnails.generate, post_ids))
+            self.stdout.write(f'Создано миниатюр для постов: {done}')
+            return
+        batch_size = options['workers'] * 4
+        done = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            while True:
+                batch = [post_id for _, post_id in zip(range(batch_size),
+                                                       post_ids)]
+                if not batch:
+                    break
+                done += sum(pool.map(generate, batch))
+        self.stdout.write(f'Создано миниатюр для постов: {done}')
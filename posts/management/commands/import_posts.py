@@ -0,0 +1,50 @@
+import gzip
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import importer
+
+
+class Command(BaseCommand):
+    help = ('Загружает пользователей, группы, посты, комментарии и подписки '
+            'из JSONL или CSV')
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+')
+        parser.add_argument('--format', choices=sorted(importer.READERS),
+                            help='по умолчанию — по расширению файла')
+        parser.add_argument('--type', choices=importer.KINDS,
+                            help='тип строк, если в файле нет поля type')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        loader = importer.Importer(batch_size=options['batch_size'])
+        started = time.perf_counter()
+        rows = 0
+        for path in options['files']:
+            compressed = path.endswith('.gz')
+            name = path[:-3] if compressed else path
+            file_format = (options['format'] or
+                           os.path.splitext(name)[1].lstrip('.').lower())
+            if file_format not in importer.READERS:
+                raise CommandError(f'Неизвестный формат файла: {path}')
+            opener = gzip.open if compressed else open
+            with opener(path, 'rt', newline='', encoding='utf-8') as stream:
+                for line, row in enumerate(
+                        importer.READERS[file_format](stream), 1):
+                    try:
+                        loader.add(row, options['type'])
+                    except importer.InvalidRow as exc:
+                        raise CommandError(f'{path}, запись {line}: {exc}')
+                    rows += 1
+        loader.finish()
+        elapsed = time.perf_counter() - started
+        for kind in importer.KINDS:
+            self.stdout.write(
+                f'{kind}: создано {loader.created[kind]}, '
+                f'пропущено {loader.skipped[kind]}')
+        self.stdout.write(
+            f'Строк: {rows} за {elapsed:.1f} с '
+            f'({rows / elapsed if elapsed else 0:.0f} строк/с)')
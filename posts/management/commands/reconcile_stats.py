@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts import stats
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики подписчиков, подписок, записей '
+            'и комментариев')
+
+    def handle(self, *args, **options):
+        fixed = stats.reconcile()
+        self.stdout.write(f'Исправлено строк: {fixed}')
@@ -0,0 +1,25 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from posts import queue
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди posts_task'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=2)
+        parser.add_argument('--poll', type=float, default=1.0,
+                            help='пауза в секундах, когда очередь пуста')
+        parser.add_argument('--once', action='store_true',
+                            help='выполнить готовые задачи и выйти')
+
+    def handle(self, *args, **options):
+        worker = queue.Worker(threads=options['threads'],
+                              poll=options['poll'])
+        # SIGTERM даёт потокам закончить текущие задачи.
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *args: worker.stop())
+        done = worker.run(once=options['once'])
+        self.stdout.write(f'Выполнено задач: {done}')
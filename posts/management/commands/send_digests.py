@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts import notifications
+
+
+class Command(BaseCommand):
+    help = 'Отправляет подписчикам дайджесты новых записей'
+
+    def handle(self, *args, **options):
+        sent = notifications.send_digests()
+        self.stdout.write(f'Отправлено писем: {sent}')
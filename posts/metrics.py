@@ -0,0 +1,189 @@
+"""Метрики запросов: число и время SQL, время шаблонов, попадания в кэш
+лент и общая задержка. Счётчики текущего запроса живут в contextvar,
+агрегаты — гистограммы в памяти процесса; при нескольких воркерах каждый
+отдаёт свои, суммирует их Prometheus.
+"""
+import contextvars
+import threading
+import time
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.template.backends.django import DjangoTemplates, Template, reraise
+from django.template.exceptions import TemplateDoesNotExist
+from django.utils.crypto import constant_time_compare
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.cache = {'hits': 0, 'misses': 0}
+
+    def __call__(self, execute, sql, params, many, context):
+        # Обёртка для connection.execute_wrapper().
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.sql_time += elapsed
+            self.queries.append((sql, elapsed))
+
+    @property
+    def total(self):
+        return time.perf_counter() - self.started
+
+
+def start():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def finish(token):
+    _current.reset(token)
+
+
+def cache_event(outcome):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.cache[outcome] += 1
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics = _current.get()
+            if metrics is not None:
+                metrics.template_time += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Бэкенд шаблонов Django, который засекает время рендера. Вложенные
+    {% include %} идут мимо бэкенда, так что время не задваивается."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name),
+                                 self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, labels, value):
+        buckets, total, count = self.series.get(
+            labels, ([0] * len(self.buckets), 0.0, 0))
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                buckets[i] += 1
+        self.series[labels] = (buckets, total + value, count + 1)
+
+    def expose(self):
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} histogram'
+        for labels, (buckets, total, count) in sorted(self.series.items()):
+            for bound, bucket in zip(self.buckets, buckets):
+                yield (f'{self.name}_bucket'
+                       f'{_labels(labels, le=bound)} {bucket}')
+            yield f'{self.name}_bucket{_labels(labels, le="+Inf")} {count}'
+            yield f'{self.name}_sum{_labels(labels)} {total}'
+            yield f'{self.name}_count{_labels(labels)} {count}'
+
+
+class Counter:
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self.series = {}
+
+    def inc(self, labels, value=1):
+        self.series[labels] = self.series.get(labels, 0) + value
+
+    def expose(self):
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} counter'
+        for labels, value in sorted(self.series.items()):
+            yield f'{self.name}{_labels(labels)} {value}'
+
+
+def _labels(labels, **extra):
+    pairs = dict(labels, **extra)
+    if not pairs:
+        return ''
+    body = ','.join(f'{key}="{value}"' for key, value in pairs.items())
+    return '{' + body + '}'
+
+
+_lock = threading.Lock()
+LATENCY = Histogram('yatube_request_duration_seconds',
+                    'Время обработки запроса', LATENCY_BUCKETS)
+SQL_TIME = Histogram('yatube_request_sql_seconds',
+                     'Время SQL-запросов за запрос', LATENCY_BUCKETS)
+SQL_COUNT = Histogram('yatube_request_queries',
+                      'Число SQL-запросов за запрос', QUERY_BUCKETS)
+TEMPLATE_TIME = Histogram('yatube_request_template_seconds',
+                          'Время рендера шаблонов за запрос',
+                          LATENCY_BUCKETS)
+FEED_CACHE = Counter('yatube_feed_cache_total',
+                     'Обращения к кэшу лент')
+HISTOGRAMS = (LATENCY, SQL_TIME, SQL_COUNT, TEMPLATE_TIME)
+
+
+def observe(view, metrics):
+    labels = (('view', view),)
+    with _lock:
+        LATENCY.observe(labels, metrics.total)
+        SQL_TIME.observe(labels, metrics.sql_time)
+        SQL_COUNT.observe(labels, len(metrics.queries))
+        TEMPLATE_TIME.observe(labels, metrics.template_time)
+        for outcome, value in metrics.cache.items():
+            if value:
+                FEED_CACHE.inc(labels + (('outcome', outcome),), value)
+
+
+def reset():
+    with _lock:
+        for metric in HISTOGRAMS + (FEED_CACHE,):
+            metric.series.clear()
+
+
+def expose():
+    with _lock:
+        lines = [line for metric in HISTOGRAMS + (FEED_CACHE,)
+                 for line in metric.expose()]
+    return '\n'.join(lines) + '\n'
+
+
+def _authorized(request):
+    if request.user.is_staff:
+        return True
+    token = settings.METRICS_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    return bool(token) and constant_time_compare(header, f'Bearer {token}')
+
+
+def metrics_view(request):
+    if not _authorized(request):
+        return HttpResponseForbidden()
+    return HttpResponse(expose(),
+                        content_type='text/plain; version=0.0.4')
@@ -0,0 +1,76 @@
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics, routers
+
+logger = logging.getLogger('posts.slow_requests')
+
+
+class RequestMetricsMiddleware:
+    """Считает для каждого запроса число и время SQL, время шаблонов,
+    попадания в кэш лент и общую задержку. Итог уходит в заголовок
+    Server-Timing и в гистограммы /metrics; запросы дольше
+    SLOW_REQUEST_MS пишутся в лог вместе со списком SQL."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        current, token = metrics.start()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(current))
+                response = self.get_response(request)
+        finally:
+            metrics.finish(token)
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        metrics.observe(view, current)
+        response['Server-Timing'] = server_timing(current)
+        self.log_slow(request, view, current)
+        return response
+
+    def log_slow(self, request, view, current):
+        total_ms = current.total * 1000
+        if total_ms < settings.SLOW_REQUEST_MS:
+            return
+        queries = '\n'.join(f'  {elapsed * 1000:.1f} мс  {sql}'
+                            for sql, elapsed in current.queries)
+        logger.warning('%s %s (%s): %.1f мс, SQL-запросов: %d\n%s',
+                       request.method, request.get_full_path(), view,
+                       total_ms, len(current.queries), queries)
+
+
+def server_timing(current):
+    return ', '.join((
+        f'sql;dur={current.sql_time * 1000:.1f};'
+        f'desc="{len(current.queries)} queries"',
+        f'tpl;dur={current.template_time * 1000:.1f}',
+        f'cache;desc="hits={current.cache["hits"]} '
+        f'misses={current.cache["misses"]}"',
+        f'total;dur={current.total * 1000:.1f}',
+    ))
+
+
+class ReplicaPinMiddleware:
+    """Если запрос что-то записал в базу, ставит cookie, которая на
+    REPLICA_PIN_SECONDS закрепляет клиента за основной базой."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routing, token = routers.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.finish(token)
+        if routing.wrote:
+            response.set_cookie(settings.REPLICA_PIN_COOKIE, '1',
+                                max_age=settings.REPLICA_PIN_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
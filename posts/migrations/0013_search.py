@@ -0,0 +1,105 @@
+# Generated by Django 2.2.6 on 2026-10-18 05:48
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import posts.models
+
+FTS_COLUMNS = """
+    coalesce((SELECT title FROM posts_group WHERE id = new.group_id), ''),
+    (SELECT username FROM {user} WHERE id = new.author_id)
+"""
+
+CREATE_FTS = [
+    "CREATE VIRTUAL TABLE posts_post_fts USING fts5("
+    "text, group_title, author, tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER posts_post_fts_insert AFTER INSERT ON posts_post BEGIN "
+    "INSERT INTO posts_post_fts(rowid, text, group_title, author) "
+    "VALUES (new.id, new.text, " + FTS_COLUMNS + "); END",
+    "CREATE TRIGGER posts_post_fts_update "
+    "AFTER UPDATE OF text, group_id, author_id ON posts_post BEGIN "
+    "DELETE FROM posts_post_fts WHERE rowid = old.id; "
+    "INSERT INTO posts_post_fts(rowid, text, group_title, author) "
+    "VALUES (new.id, new.text, " + FTS_COLUMNS + "); END",
+    "CREATE TRIGGER posts_post_fts_delete AFTER DELETE ON posts_post BEGIN "
+    "DELETE FROM posts_post_fts WHERE rowid = old.id; END",
+    "CREATE TRIGGER posts_group_fts_update AFTER UPDATE OF title "
+    "ON posts_group BEGIN "
+    "UPDATE posts_post_fts SET group_title = new.title WHERE rowid IN "
+    "(SELECT id FROM posts_post WHERE group_id = new.id); END",
+    "CREATE TRIGGER {user}_fts_update AFTER UPDATE OF username "
+    "ON {user} BEGIN "
+    "UPDATE posts_post_fts SET author = new.username WHERE rowid IN "
+    "(SELECT id FROM posts_post WHERE author_id = new.id); END",
+    "INSERT INTO posts_post_fts(rowid, text, group_title, author) "
+    "SELECT p.id, p.text, coalesce(g.title, ''), u.username "
+    "FROM posts_post p JOIN {user} u ON u.id = p.author_id "
+    "LEFT JOIN posts_group g ON g.id = p.group_id",
+]
+
+DROP_FTS = [
+    "DROP TRIGGER IF EXISTS posts_post_fts_insert",
+    "DROP TRIGGER IF EXISTS posts_post_fts_update",
+    "DROP TRIGGER IF EXISTS posts_post_fts_delete",
+    "DROP TRIGGER IF EXISTS posts_group_fts_update",
+    "DROP TRIGGER IF EXISTS {user}_fts_update",
+    "DROP TABLE IF EXISTS posts_post_fts",
+]
+
+
+def has_fts5(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return ('ENABLE_FTS5',) in cursor.fetchall()
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        if not has_fts5(schema_editor.connection):
+            return
+        user = apps.get_model(settings.AUTH_USER_MODEL)._meta.db_table
+        for statement in statements:
+            schema_editor.execute(statement.format(user=user))
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0012_userstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostSearchIndex',
+            fields=[
+                ('post', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='posts.Post')),
+                ('text', models.TextField()),
+                ('group_title', models.TextField()),
+                ('author', models.TextField()),
+                ('document', posts.models.SearchDocumentField(db_column='posts_post_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'posts_post_fts',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchToken',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveIntegerField(default=1)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='posts.Post')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='searchtoken',
+            index=models.Index(fields=['term', 'post'], name='search_term_post'),
+        ),
+        migrations.RunPython(run(CREATE_FTS), run(DROP_FTS)),
+    ]
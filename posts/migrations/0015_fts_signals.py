@@ -0,0 +1,30 @@
+import importlib
+
+from django.conf import settings
+from django.db import migrations
+
+search_migration = importlib.import_module('posts.migrations.0013_search')
+
+# Таблицы с триггерами нельзя перестраивать миграциями SQLite (ALTER через
+# копирование таблицы), поэтому FTS-индекс теперь обновляют сигналы.
+TRIGGERS = [
+    statement for statement in search_migration.CREATE_FTS
+    if statement.startswith('CREATE TRIGGER')
+]
+DROP_TRIGGERS = [
+    statement for statement in search_migration.DROP_FTS
+    if statement.startswith('DROP TRIGGER')
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0014_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(search_migration.run(DROP_TRIGGERS),
+                             search_migration.run(TRIGGERS)),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.6 on 2026-10-18 05:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_post_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_original_size',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='размер загруженной картинки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_size',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='размер сохранённой картинки'),
+        ),
+    ]
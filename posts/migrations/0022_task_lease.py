@@ -0,0 +1,18 @@
+# Generated by Django 2.2.6 on 2026-10-18 06:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_notification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='lease',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+    ]
@@ -1,9 +1,17 @@
+import json
+
 from django.contrib.auth import get_user_model
 from django.db import models
-from django.db.models import UniqueConstraint
+from django.db.models import (Count, Index, Lookup, OuterRef, Subquery,
+                              UniqueConstraint)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.functional import cached_property
 
 User = get_user_model()
 
+PATH_WIDTH = 10
+
 
 class Group(models.Model):
     title = models.CharField('Сообщество', max_length=200,
@@ -15,6 +23,19 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для вывода через includes/post_item.html: автор и
+        сообщество подтягиваются join-ом, число комментариев считается
+        коррелированным подзапросом, без запросов на каждый пост."""
+        comments = Comment.objects.filter(
+            post=OuterRef('pk')
+        ).order_by().values('post').annotate(total=Count('*')).values('total')
+        return self.select_related('author', 'group').annotate(
+            comment_count=Coalesce(Subquery(comments), 0)
+        )
+
+
 class Post(models.Model):
     text = models.TextField('Текст записи', help_text='Введите текст записи')
     pub_date = models.DateTimeField('дата публикации', auto_now_add=True)
@@ -23,12 +44,31 @@ class Post(models.Model):
     group = models.ForeignKey(Group, on_delete=models.SET_NULL,
                               blank=True, null=True, related_name='posts')
     image = models.ImageField(upload_to='posts/', blank=True, null=True)
+    image_original_size = models.PositiveIntegerField(
+        'размер загруженной картинки', blank=True, null=True, editable=False)
+    image_size = models.PositiveIntegerField(
+        'размер сохранённой картинки', blank=True, null=True, editable=False)
+    thumbnails = models.TextField(blank=True, default='', editable=False)
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:15]
 
+    @cached_property
+    def thumbnail_presets(self):
+        """Готовые миниатюры: {пресет: {'url', 'width', 'height'}}."""
+        return json.loads(self.thumbnails) if self.thumbnails else {}
+
     class Meta:
         ordering = ('-pub_date',)
+        indexes = (
+            Index(fields=('pub_date', 'id'), name='post_pub_date'),
+            Index(fields=('group', 'pub_date', 'id'),
+                  name='post_group_pub_date'),
+            Index(fields=('author', 'pub_date', 'id'),
+                  name='post_author_pub_date'),
+        )
 
 
 class Comment(models.Model):
@@ -38,6 +78,25 @@ class Comment(models.Model):
                                related_name='comments')
     text = models.TextField('Комментарий', help_text='Введите комментарий')
     created = models.DateTimeField('Дата публикации', auto_now_add=True)
+    parent = models.ForeignKey('self', on_delete=models.CASCADE,
+                               blank=True, null=True, related_name='replies')
+    # Материализованный путь, см. posts.threads.
+    path = models.CharField(max_length=255, blank=True, default='',
+                            editable=False)
+    reply_count = models.PositiveIntegerField(default=0, editable=False)
+
+    @property
+    def depth(self):
+        return max(len(self.path) // PATH_WIDTH - 1, 0)
+
+    class Meta:
+        # Порядок обхода веток идёт по индексу (post, path); id в SQLite
+        # лежит в каждом индексе и разрешает пустые пути до нумерации.
+        ordering = ('path', 'id')
+        indexes = (
+            Index(fields=('post', 'created'), name='comment_post_created'),
+            Index(fields=('post', 'path'), name='comment_post_path'),
+        )
 
 
 class Follow(models.Model):
@@ -48,4 +107,147 @@ class Follow(models.Model):
 
     class Meta:
         constraints = (UniqueConstraint(fields=('user', 'author'),
-                                        name='unique_follow'))
+                                        name='unique_follow'),)
+
+
+class TimelineEntry(models.Model):
+    """Запись материализованной ленты подписок: пост автора, на которого
+    подписан user. Дата публикации продублирована, чтобы лента читалась
+    одним диапазоном по индексу (user, pub_date, post)."""
+    user = models.ForeignKey(User, related_name='timeline',
+                             on_delete=models.CASCADE)
+    post = models.ForeignKey(Post, related_name='timeline_entries',
+                             on_delete=models.CASCADE)
+    author = models.ForeignKey(User, related_name='+',
+                               on_delete=models.CASCADE)
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = (UniqueConstraint(fields=('user', 'post'),
+                                        name='unique_timeline_entry'),)
+        indexes = (
+            Index(fields=('user', 'pub_date', 'post'),
+                  name='timeline_user_pub_date'),
+            Index(fields=('user', 'author'), name='timeline_user_author'),
+        )
+
+
+class Notification(models.Model):
+    """Новый пост автора во входящих подписчика. emailed — запись уже
+    ушла в письмо-дайджест или прочитана до него."""
+    user = models.ForeignKey(User, related_name='notifications',
+                             on_delete=models.CASCADE)
+    post = models.ForeignKey(Post, related_name='+',
+                             on_delete=models.CASCADE)
+    created = models.DateTimeField(auto_now_add=True)
+    read = models.BooleanField(default=False)
+    emailed = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = (UniqueConstraint(fields=('user', 'post'),
+                                        name='unique_notification'),)
+        indexes = (
+            Index(fields=('user', 'created', 'id'),
+                  name='notification_inbox'),
+            Index(fields=('emailed', 'user'), name='notification_pending'),
+        )
+
+
+class UserStats(models.Model):
+    """Денормализованные счётчики профиля, обновляются сигналами."""
+    user = models.OneToOneField(User, primary_key=True, related_name='stats',
+                                on_delete=models.CASCADE)
+    followers = models.PositiveIntegerField('Подписчиков', default=0)
+    following = models.PositiveIntegerField('Подписан', default=0)
+    posts = models.PositiveIntegerField('Записей', default=0)
+    comments = models.PositiveIntegerField('Комментариев', default=0)
+
+
+class SearchDocumentField(models.TextField):
+    """Скрытый столбец FTS5-таблицы с её же именем: по нему MATCH ищет
+    сразу по всем столбцам."""
+
+
+@SearchDocumentField.register_lookup
+class Match(Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+class PostSearchIndex(models.Model):
+    """Виртуальная FTS5-таблица posts_post_fts. Её заполняют обработчики
+    сигналов posts.signals (index_post, unindex_post и переиндексация при
+    смене названия группы или имени автора) через posts.search."""
+    post = models.OneToOneField(Post, primary_key=True, db_column='rowid',
+                                related_name='search_index',
+                                on_delete=models.DO_NOTHING)
+    text = models.TextField()
+    group_title = models.TextField()
+    author = models.TextField()
+    document = SearchDocumentField(db_column='posts_post_fts')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'posts_post_fts'
+
+
+class SearchToken(models.Model):
+    """Инвертированный индекс для баз без FTS5."""
+    term = models.CharField(max_length=64)
+    post = models.ForeignKey(Post, related_name='search_tokens',
+                             on_delete=models.CASCADE)
+    weight = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = (Index(fields=('term', 'post'), name='search_term_post'),)
+
+
+class Task(models.Model):
+    """Фоновая задача, см. posts.queue."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(max_length=100)
+    args = models.TextField(default='[]')
+    priority = models.SmallIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUSES,
+                              default=QUEUED)
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    # Уникальный ключ не даёт поставить одну задачу дважды, например
+    # периодическую задачу одного интервала из нескольких воркеров.
+    key = models.CharField(max_length=200, blank=True, null=True,
+                           unique=True)
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+    locked_at = models.DateTimeField(blank=True, null=True)
+    # Метка захвата: результат записывается, только если задачу с тех пор
+    # не вернули в очередь и не забрал другой воркер.
+    lease = models.CharField(max_length=32, blank=True, default='',
+                             editable=False)
+    last_error = models.TextField(blank=True, default='')
+    created = models.DateTimeField(auto_now_add=True)
+    finished = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
+
+    class Meta:
+        indexes = (
+            # Выборка очереди: status = ? ORDER BY priority DESC, run_at.
+            Index(fields=('status', '-priority', 'run_at', 'id'),
+                  name='task_queue'),
+        )
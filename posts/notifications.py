@@ -0,0 +1,99 @@
+"""Уведомления подписчиков о новых постах.
+
+При публикации каждому подписчику добавляется запись во входящие; письма
+не отправляются по одному на пост, а собираются в дайджест: раз в
+NOTIFICATION_DIGEST_WINDOW пользователь получает одно письмо со всеми
+постами, накопившимися за это время. Подписчики и получатели читаются
+пачками по NOTIFICATION_BATCH_SIZE, а письма пачки уходят через одно
+соединение с почтовым сервером.
+"""
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Min
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import Follow, Notification
+
+
+def fan_out(post):
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    batch_size = settings.NOTIFICATION_BATCH_SIZE
+    batch = []
+    for user_id in follower_ids.iterator(chunk_size=batch_size):
+        batch.append(Notification(user_id=user_id, post_id=post.id))
+        if len(batch) == batch_size:
+            Notification.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        Notification.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def due_users(now=None):
+    """id получателей, чьё самое старое неотправленное уведомление
+    ждёт дольше окна дайджеста, по возрастанию."""
+    now = now or timezone.now()
+    cutoff = now - timedelta(seconds=settings.NOTIFICATION_DIGEST_WINDOW)
+    return Notification.objects.filter(emailed=False).values(
+        'user_id').annotate(first=Min('created')).filter(
+        first__lte=cutoff).order_by('user_id').values_list(
+        'user_id', flat=True)
+
+
+def digest(user, notifications):
+    limit = settings.NOTIFICATION_DIGEST_MAX_POSTS
+    return EmailMessage(
+        subject=f'Новые записи ({len(notifications)}) на Yatube',
+        body=render_to_string('emails/digest.txt', {
+            'site': settings.SITE_URL,
+            'user': user,
+            'notifications': notifications[:limit],
+            'more': max(len(notifications) - limit, 0),
+        }),
+        to=[user.email],
+    )
+
+
+def send_digests(now=None):
+    """Отправляет дайджесты всем, кому пора. На пачку получателей —
+    два запроса на чтение, одно обновление и одно соединение с почтой.
+    Возвращает число отправленных писем."""
+    users = due_users(now)
+    sent = 0
+    last_user = 0
+    while True:
+        user_ids = list(users.filter(
+            user_id__gt=last_user)[:settings.NOTIFICATION_BATCH_SIZE])
+        if not user_ids:
+            return sent
+        last_user = user_ids[-1]
+        pending = Notification.objects.filter(
+            user_id__in=user_ids, emailed=False
+        ).select_related('user', 'post__author').order_by(
+            'user_id', '-created', '-id')
+        messages = []
+        last_id = 0
+        for user, group in groupby(pending, key=lambda n: n.user):
+            group = list(group)
+            last_id = max(last_id, max(n.id for n in group))
+            if user.email:
+                messages.append(digest(user, group))
+        if messages:
+            sent += get_connection().send_messages(messages) or 0
+        # Уведомления, пришедшие во время отправки, уйдут в следующий раз.
+        Notification.objects.filter(
+            user_id__in=user_ids, emailed=False, id__lte=last_id
+        ).update(emailed=True)
+
+
+def mark_read(user, notifications):
+    """Прочитанное во входящих в дайджест уже не попадает."""
+    ids = [n.id for n in notifications if not n.read]
+    if ids:
+        Notification.objects.filter(user=user, id__in=ids).update(
+            read=True, emailed=True)
@@ -0,0 +1,151 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import F, Q
+from django.utils.functional import SimpleLazyObject
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _json_default(value):
+    # DjangoJSONEncoder обрезает микросекунды, а для keyset-курсора
+    # нужно точное значение ключа.
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(direction, values):
+    payload = json.dumps([direction, list(values)], default=_json_default,
+                         separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        direction, values = json.loads(
+            base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError, binascii.Error):
+        raise InvalidCursor(token)
+    if direction not in (NEXT, PREVIOUS) or not isinstance(values, list):
+        raise InvalidCursor(token)
+    return direction, values
+
+
+class CursorPaginator:
+    """Keyset-пагинация: страница выбирается условием по ключу сортировки
+    вместо OFFSET, поэтому тысячная страница стоит столько же, сколько
+    первая, и COUNT(*) не выполняется.
+
+    get_page() возвращает обычный Page (шаблоны и тесты работают с ним как
+    раньше) с дополнительными атрибутами cursor, next_cursor и
+    previous_cursor. page.paginator — ленивый Paginator по исходному
+    queryset, он ничего не считает, пока к нему не обратятся.
+    """
+
+    def __init__(self, object_list, per_page, ordering=('-pub_date', '-id')):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.aliases = tuple(f'cursor_{i}' for i in range(len(ordering)))
+
+    def get_page(self, cursor=None):
+        queryset = self.object_list.annotate(**{
+            alias: F(field.lstrip('-'))
+            for alias, field in zip(self.aliases, self.ordering)
+        })
+        try:
+            direction, values = self._decode(queryset, cursor)
+        except InvalidCursor:
+            cursor, direction, values = '', NEXT, None
+        backwards = direction == PREVIOUS
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, backwards))
+        rows = list(
+            queryset.order_by(*self._order(backwards))[:self.per_page + 1]
+        )
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            if not has_more:
+                # Дошли до начала ленты: отдаём полную первую страницу.
+                return self.get_page()
+            rows.reverse()
+            has_next, has_previous = True, True
+        else:
+            has_next, has_previous = has_more, values is not None
+
+        page = Page(rows, 1, Paginator(self.object_list, self.per_page))
+        page.cursor = cursor or ''
+        page.next_cursor = (
+            encode_cursor(NEXT, self._key(rows[-1]))
+            if has_next and rows else ''
+        )
+        page.previous_cursor = (
+            encode_cursor(PREVIOUS, self._key(rows[0]))
+            if has_previous and rows else ''
+        )
+        return page
+
+    def lazy_page(self, cursor=None, next_cursor='', previous_cursor=''):
+        """Page, строки которого выбираются только при первом обращении.
+        Нужен, когда разметка страницы уже взята из кэша, а курсоры
+        соседних страниц сохранены вместе с ней."""
+        page = Page(SimpleLazyObject(
+            lambda: self.get_page(cursor).object_list), 1,
+            Paginator(self.object_list, self.per_page))
+        page.cursor = cursor or ''
+        page.next_cursor = next_cursor
+        page.previous_cursor = previous_cursor
+        return page
+
+    def _decode(self, queryset, cursor):
+        if not cursor:
+            return NEXT, None
+        direction, values = decode_cursor(cursor)
+        if len(values) != len(self.aliases):
+            raise InvalidCursor(cursor)
+        try:
+            values = [
+                queryset.query.annotations[alias].output_field.to_python(value)
+                for alias, value in zip(self.aliases, values)
+            ]
+        except ValidationError:
+            raise InvalidCursor(cursor)
+        if any(value is None for value in values):
+            raise InvalidCursor(cursor)
+        return direction, values
+
+    def _descending(self, index, backwards):
+        return self.ordering[index].startswith('-') != backwards
+
+    def _order(self, backwards):
+        return [
+            ('-' if self._descending(i, backwards) else '') + alias
+            for i, alias in enumerate(self.aliases)
+        ]
+
+    def _seek(self, values, backwards):
+        # (a, b) < (x, y) записывается как a <= x AND (a < x OR a = x AND
+        # b < y): первое условие даёт СУБД диапазон по индексу.
+        first = 'lte' if self._descending(0, backwards) else 'gte'
+        chain = Q()
+        for i, alias in enumerate(self.aliases):
+            lookup = 'lt' if self._descending(i, backwards) else 'gt'
+            equal = dict(zip(self.aliases[:i], values[:i]))
+            chain |= Q(**equal, **{f'{alias}__{lookup}': values[i]})
+        return Q(**{f'{self.aliases[0]}__{first}': values[0]}) & chain
+
+    def _key(self, row):
+        if isinstance(row, dict):
+            return [row[alias] for alias in self.aliases]
+        return [getattr(row, alias) for alias in self.aliases]
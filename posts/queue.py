@@ -0,0 +1,218 @@
+"""Очередь фоновых задач в таблице posts_task, без внешнего брокера.
+
+Задача ставится в той же транзакции, что и запись, которая её вызвала:
+откат отменяет и задачу, а воркер увидит её только после коммита.
+Воркер (manage.py run_worker) забирает задачи по приоритету и времени
+запуска; упавшая задача перезапускается с экспоненциальной задержкой,
+пока не кончатся попытки. Периодические задачи из TASK_SCHEDULE ставит
+сам воркер, уникальный key не даёт нескольким воркерам поставить одну
+и ту же дважды.
+
+С TASKS_EAGER задачи выполняются сразу при постановке — так работают
+тесты и разработка без воркера.
+"""
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+class TaskType:
+    def __init__(self, name, function, priority, max_attempts):
+        self.name = name
+        self.function = function
+        self.priority = priority
+        self.max_attempts = max_attempts
+
+
+def task(name, priority=0, max_attempts=5):
+    """Регистрирует функцию как задачу. Аргументы задачи хранятся в JSON,
+    поэтому передавать нужно id, а не объекты."""
+    def decorator(function):
+        _registry[name] = TaskType(name, function, priority, max_attempts)
+        return function
+    return decorator
+
+
+def enqueue(name, *args, priority=None, run_at=None, key=None):
+    task_type = _registry[name]
+    if settings.TASKS_EAGER and run_at is None:
+        try:
+            task_type.function(*args)
+        except Exception:
+            logger.exception('Задача %s%r упала', name, args)
+        return None
+    values = {
+        'name': name,
+        'args': json.dumps(args),
+        'priority': task_type.priority if priority is None else priority,
+        'max_attempts': task_type.max_attempts,
+        'run_at': run_at or timezone.now(),
+    }
+    if key is None:
+        return Task.objects.create(**values)
+    Task.objects.bulk_create([Task(key=key, **values)],
+                             ignore_conflicts=True)
+    return None
+
+
+def backoff(attempts):
+    """Задержка перед следующей попыткой: удваивается с каждой, с
+    разбросом, чтобы упавшие вместе задачи не возвращались разом."""
+    delay = settings.TASK_RETRY_DELAY * 2 ** (attempts - 1)
+    return timedelta(seconds=delay * random.uniform(0.5, 1.5))
+
+
+def claim(worker, limit=1):
+    """Забирает до limit готовых задач. UPDATE повторно проверяет статус
+    и ставит свою метку lease, поэтому из выбранных достаются только те
+    строки, которые никто не успел забрать раньше, на любой базе и без
+    BEGIN IMMEDIATE."""
+    now = timezone.now()
+    lease = uuid.uuid4().hex
+    with transaction.atomic():
+        ids = list(Task.objects.filter(
+            status=Task.QUEUED, run_at__lte=now
+        ).order_by('-priority', 'run_at', 'id').values_list(
+            'id', flat=True)[:limit])
+        if not ids:
+            return []
+        Task.objects.filter(id__in=ids, status=Task.QUEUED).update(
+            status=Task.RUNNING, locked_by=worker, locked_at=now,
+            lease=lease)
+        return list(Task.objects.filter(id__in=ids, lease=lease).order_by(
+            '-priority', 'run_at', 'id'))
+
+
+def execute(task_row):
+    task_type = _registry.get(task_row.name)
+    task_row.attempts += 1
+    try:
+        if task_type is None:
+            raise LookupError(f'Неизвестная задача {task_row.name}')
+        task_type.function(*json.loads(task_row.args))
+    except Exception:
+        task_row.last_error = traceback.format_exc()
+        if task_row.attempts < task_row.max_attempts:
+            task_row.status = Task.QUEUED
+            task_row.run_at = timezone.now() + backoff(task_row.attempts)
+        else:
+            task_row.status = Task.FAILED
+            task_row.finished = timezone.now()
+            logger.error('Задача %s исчерпала попытки:\n%s', task_row,
+                         task_row.last_error)
+    else:
+        task_row.status = Task.DONE
+        task_row.finished = timezone.now()
+    # Задачу могли вернуть в очередь как зависшую, пока она выполнялась;
+    # тогда результат принадлежит уже следующему захвату.
+    saved = Task.objects.filter(pk=task_row.pk, lease=task_row.lease).update(
+        status=task_row.status, attempts=task_row.attempts,
+        run_at=task_row.run_at, last_error=task_row.last_error,
+        finished=task_row.finished, locked_by='', locked_at=None, lease='')
+    if not saved:
+        logger.warning('Задача %s была возвращена в очередь, результат '
+                       'воркера %s отброшен', task_row, task_row.locked_by)
+        return False
+    task_row.locked_by = ''
+    task_row.locked_at = None
+    task_row.lease = ''
+    return task_row.status == Task.DONE
+
+
+def release_stale():
+    """Возвращает в очередь задачи воркеров, которые упали, не закончив:
+    их блокировка старше TASK_LOCK_TIMEOUT. Метка lease сбрасывается, и
+    если воркер всё-таки жив, его результат не будет записан."""
+    expired = timezone.now() - timedelta(seconds=settings.TASK_LOCK_TIMEOUT)
+    return Task.objects.filter(status=Task.RUNNING,
+                               locked_at__lt=expired).update(
+        status=Task.QUEUED, locked_by='', locked_at=None, lease='')
+
+
+def schedule_periodic(now=None):
+    """Ставит периодические задачи текущего интервала. Ключ — имя и номер
+    интервала, так что повторный вызов ничего не добавляет."""
+    now = now or timezone.now()
+    for name, every in settings.TASK_SCHEDULE.items():
+        slot = int(now.timestamp() // every)
+        enqueue(name, run_at=now, key=f'{name}@{slot}')
+
+
+@task('queue.purge', priority=-10)
+def purge():
+    """Удаляет выполненные задачи старше TASK_RETENTION."""
+    expired = timezone.now() - timedelta(seconds=settings.TASK_RETENTION)
+    Task.objects.filter(status=Task.DONE, finished__lt=expired).delete()
+
+
+class Worker:
+    """Потоки, каждый из которых забирает и выполняет задачи по одной.
+    Первый поток между задачами возвращает зависшие задачи и ставит
+    периодические; при threads=1 он же — текущий поток."""
+
+    def __init__(self, threads=1, poll=1.0):
+        self.threads = threads
+        self.poll = poll
+        self.name = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopped = threading.Event()
+        self.done = 0
+        self._lock = threading.Lock()
+
+    def stop(self):
+        self.stopped.set()
+
+    def run(self, once=False):
+        """once — выполнить всё, что готово, и выйти."""
+        if self.threads == 1:
+            self.loop(once, 0)
+            return self.done
+        workers = [threading.Thread(target=self.loop, args=(once, i),
+                                    name=f'task-worker-{i}')
+                   for i in range(self.threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return self.done
+
+    def loop(self, once, number):
+        worker = f'{self.name}/{number}'
+        maintained = None
+        try:
+            while not self.stopped.is_set():
+                close_old_connections()
+                if number == 0 and (maintained is None or
+                                    time.monotonic() - maintained >=
+                                    self.poll):
+                    release_stale()
+                    schedule_periodic()
+                    maintained = time.monotonic()
+                tasks = claim(worker)
+                if not tasks:
+                    if once:
+                        return
+                    self.stopped.wait(self.poll)
+                    continue
+                for task_row in tasks:
+                    if execute(task_row):
+                        with self._lock:
+                            self.done += 1
+        finally:
+            connection.close()
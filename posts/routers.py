@@ -0,0 +1,89 @@
+"""Чтение лент и профилей с реплик.
+
+На реплику идут только чтения представлений, помеченных replica_reads;
+формы, админка, команды и все записи работают с основной базой. Реплика
+отстаёт от основной, поэтому после любой записи клиент получает cookie
+и REPLICA_PIN_SECONDS читает только основную базу — так автор сразу
+видит свой пост или комментарий.
+"""
+import contextvars
+import random
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_current = contextvars.ContextVar('replica_routing', default=None)
+
+
+class Routing:
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.read_alias = None
+        self.wrote = False
+
+
+def start(request):
+    routing = Routing(settings.REPLICA_PIN_COOKIE in request.COOKIES)
+    return routing, _current.set(routing)
+
+
+def finish(token):
+    _current.reset(token)
+
+
+def reading_replica():
+    """Идёт ли текущий запрос на реплику."""
+    routing = _current.get()
+    return routing is not None and bool(routing.read_alias)
+
+
+def replica_reads(view):
+    """Чтения представления идут на одну из реплик, если клиент не
+    закреплён за основной базой."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        routing = _current.get()
+        if (routing is None or routing.pinned or
+                not settings.DATABASE_REPLICAS):
+            return view(request, *args, **kwargs)
+        # Сессия и пользователь читаются с основной базы до переключения:
+        # на отстающей реплике только что вошедший ещё не авторизован.
+        request.user.is_authenticated
+        # Одна реплика на весь запрос: страница видит один снимок.
+        routing.read_alias = random.choice(settings.DATABASE_REPLICAS)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            routing.read_alias = None
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        routing = _current.get()
+        if routing is not None and routing.read_alias:
+            return routing.read_alias
+        return None
+
+    def db_for_write(self, model, **hints):
+        routing = _current.get()
+        if routing is not None:
+            routing.wrote = True
+        # Объект, прочитанный с реплики, сохраняется в основную базу.
+        instance = hints.get('instance')
+        if (instance is not None and
+                instance._state.db in settings.DATABASE_REPLICAS):
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        copies = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in copies and obj2._state.db in copies:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -0,0 +1,141 @@
+import operator
+import re
+from collections import Counter
+from functools import reduce
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Max, Q, Sum, When
+
+from .models import Post, SearchToken
+
+MAX_TERMS = 10
+TERM_LENGTH = 64
+FIELD_WEIGHTS = (('text', 1), ('group_title', 2), ('author', 2))
+CHUNK_SIZE = 500
+
+_fts_available = None
+
+
+def terms(query):
+    words = re.findall(r'\w+', query.lower())
+    return list(dict.fromkeys(w[:TERM_LENGTH] for w in words))[:MAX_TERMS]
+
+
+def backend():
+    global _fts_available
+    if settings.SEARCH_BACKEND != 'auto':
+        return settings.SEARCH_BACKEND
+    if _fts_available is None:
+        _fts_available = (
+            connection.vendor == 'sqlite' and
+            'posts_post_fts' in connection.introspection.table_names()
+        )
+    return 'fts5' if _fts_available else 'index'
+
+
+def _fts5(words):
+    expression = ' '.join(
+        '"{}"*'.format(word.replace('"', '""')) for word in words
+    )
+    return (
+        Post.objects.for_feed().filter(
+            search_index__document__match=expression),
+        ('search_index__rank', 'id'),
+    )
+
+
+def _index(words):
+    # Как и в FTS5-запросе, каждое слово ищется как префикс, и пост должен
+    # содержать все слова.
+    matches = [Q(search_tokens__term__startswith=word) for word in words]
+    queryset = Post.objects.for_feed().filter(
+        reduce(operator.or_, matches)
+    ).annotate(
+        search_score=Sum('search_tokens__weight'),
+        **{
+            f'search_has_{i}': Max(Case(When(match, then=1), default=0,
+                                        output_field=IntegerField()))
+            for i, match in enumerate(matches)
+        }
+    ).filter(**{f'search_has_{i}': 1 for i in range(len(words))})
+    return queryset, ('-search_score', '-id')
+
+
+def search(query):
+    """Возвращает queryset найденных постов и порядок, в котором его
+    нужно листать CursorPaginator-ом: сначала самые релевантные."""
+    words = terms(query)
+    if not words:
+        return Post.objects.for_feed().none(), ('-pub_date', '-id')
+    if backend() == 'fts5':
+        return _fts5(words)
+    return _index(words)
+
+
+FTS_INSERT = (
+    'INSERT INTO posts_post_fts(rowid, text, group_title, author) '
+    "SELECT p.id, p.text, coalesce(g.title, ''), u.username "
+    'FROM posts_post p JOIN {user} u ON u.id = p.author_id '
+    'LEFT JOIN posts_group g ON g.id = p.group_id'
+)
+
+
+def _fts_insert(where='', params=()):
+    user_table = Post._meta.get_field('author').related_model._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(FTS_INSERT.format(user=user_table) + where, params)
+
+
+def _fts_delete(where='', params=()):
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM posts_post_fts' + where, params)
+
+
+def _tokens(post):
+    weights = Counter()
+    values = {
+        'text': post.text,
+        'group_title': post.group.title if post.group_id else '',
+        'author': post.author.username,
+    }
+    for field, weight in FIELD_WEIGHTS:
+        for word in re.findall(r'\w+', values[field].lower()):
+            weights[word[:TERM_LENGTH]] += weight
+    return [SearchToken(term=term, post_id=post.id, weight=weight)
+            for term, weight in weights.items()]
+
+
+def reindex(posts):
+    """Обновляет индекс для постов из queryset."""
+    if backend() == 'fts5':
+        post_ids = list(posts.values_list('id', flat=True))
+        for start in range(0, len(post_ids), CHUNK_SIZE):
+            chunk = post_ids[start:start + CHUNK_SIZE]
+            marks = ', '.join(['%s'] * len(chunk))
+            _fts_delete(f' WHERE rowid IN ({marks})', chunk)
+            _fts_insert(f' WHERE p.id IN ({marks})', chunk)
+        return
+    posts = posts.select_related('author', 'group').order_by('pk')
+    for post in posts.iterator(chunk_size=CHUNK_SIZE):
+        SearchToken.objects.filter(post_id=post.id).delete()
+        SearchToken.objects.bulk_create(_tokens(post))
+
+
+def index_post(post):
+    reindex(Post.objects.filter(pk=post.pk))
+
+
+def unindex_post(post):
+    # Токены удаляются каскадом вместе с постом.
+    if backend() == 'fts5':
+        _fts_delete(' WHERE rowid = %s', [post.pk])
+
+
+def rebuild():
+    if backend() == 'fts5':
+        _fts_delete()
+        _fts_insert()
+        return
+    SearchToken.objects.all().delete()
+    reindex(Post.objects.all())
@@ -0,0 +1,153 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import caching, queue, search, stats, threads, timeline
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+@receiver(post_save, sender=User)
+def create_user_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        queue.enqueue('timeline.fan_out', instance.id)
+
+
+@receiver(post_save, sender=Post)
+def notify_followers(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        queue.enqueue('notifications.fan_out', instance.id)
+
+
+@receiver(post_save, sender=Post)
+def count_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        stats.bump(instance.author_id, posts=1)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post(sender, instance, **kwargs):
+    stats.bump(instance.author_id, posts=-1)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        stats.bump(instance.author_id, comments=1)
+
+
+@receiver(post_save, sender=Comment)
+def place_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        threads.place(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def unplace_comment(sender, instance, **kwargs):
+    threads.unplace(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    stats.bump(instance.author_id, comments=-1)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        queue.enqueue('timeline.backfill', instance.user_id,
+                      instance.author_id)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        stats.bump(instance.author_id, followers=1)
+        stats.bump(instance.user_id, following=1)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline(sender, instance, **kwargs):
+    timeline.prune(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    stats.bump(instance.author_id, followers=-1)
+    stats.bump(instance.user_id, following=-1)
+
+
+def post_scopes(post):
+    scopes = ['global', f'author:{post.author_id}']
+    if post.group_id:
+        scopes.append(f'group:{post.group_id}')
+    return scopes
+
+
+@receiver(pre_save, sender=Post)
+def remember_group(sender, instance, raw=False, **kwargs):
+    if instance.pk and not raw:
+        instance._old_group_id = Post.objects.filter(
+            pk=instance.pk).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    scopes = post_scopes(instance)
+    old_group_id = getattr(instance, '_old_group_id', None)
+    if old_group_id and old_group_id != instance.group_id:
+        scopes.append(f'group:{old_group_id}')
+    caching.bump(*scopes)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_feeds(sender, instance, raw=False, **kwargs):
+    if not raw:
+        caching.bump(*post_scopes(instance.post))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_feed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        caching.bump(f'follow:{instance.user_id}')
+
+
+@receiver(post_save, sender=Group)
+def invalidate_group_feeds(sender, instance, raw=False, **kwargs):
+    if not raw:
+        caching.bump('global', 'groups', f'group:{instance.id}')
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.unindex_post(instance)
+
+
+@receiver(post_save, sender=Group)
+def index_group_posts(sender, instance, created, raw=False, **kwargs):
+    if not raw and not created:
+        search.reindex(instance.posts.all())
+
+
+@receiver(post_save, sender=User)
+def index_author_posts(sender, instance, created, raw=False,
+                       update_fields=None, **kwargs):
+    if raw or created:
+        return
+    if update_fields is None or 'username' in update_fields:
+        search.reindex(instance.posts.all())
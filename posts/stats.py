@@ -0,0 +1,70 @@
+from django.db import router
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Post, User, UserStats
+
+CHUNK_SIZE = 1000
+FIELDS = ('followers', 'following', 'posts', 'comments')
+
+
+def bump(user_id, **deltas):
+    # Строку не создаём: при каскадном удалении пользователя она бы
+    # воскресла. Недостающие строки создаёт get_for() или reconcile().
+    UserStats.objects.filter(user_id=user_id).update(**{
+        field: F(field) + delta for field, delta in deltas.items()
+    })
+
+
+def _count(queryset, field):
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+            field).annotate(total=Count('*')).values('total')
+    ), 0)
+
+
+def _with_counts(users):
+    return users.annotate(
+        followers_total=_count(Follow.objects.all(), 'author'),
+        following_total=_count(Follow.objects.all(), 'user'),
+        posts_total=_count(Post.objects.all(), 'author'),
+        comments_total=_count(Comment.objects.all(), 'author'),
+    ).values_list('pk', *(f'{field}_total' for field in FIELDS))
+
+
+def reconcile(users=None):
+    """Пересчитывает счётчики по исходным таблицам, создаёт недостающие
+    строки. Возвращает число исправленных строк."""
+    if users is None:
+        users = User.objects.all()
+    fixed = 0
+    rows = _with_counts(users.order_by('pk')).iterator(chunk_size=CHUNK_SIZE)
+    while True:
+        chunk = [row for _, row in zip(range(CHUNK_SIZE), rows)]
+        if not chunk:
+            return fixed
+        existing = UserStats.objects.in_bulk([row[0] for row in chunk])
+        created, changed = [], []
+        for user_id, *totals in chunk:
+            actual = dict(zip(FIELDS, totals))
+            stats = existing.get(user_id)
+            if stats is None:
+                created.append(UserStats(user_id=user_id, **actual))
+            elif any(getattr(stats, f) != actual[f] for f in FIELDS):
+                for field, value in actual.items():
+                    setattr(stats, field, value)
+                changed.append(stats)
+        UserStats.objects.bulk_create(created, ignore_conflicts=True)
+        UserStats.objects.bulk_update(changed, FIELDS)
+        fixed += len(created) + len(changed)
+
+
+def get_for(user):
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        reconcile(User.objects.filter(pk=user.pk))
+        # Строка только что создана в основной базе, реплика её может
+        # ещё не видеть.
+        return UserStats.objects.using(
+            router.db_for_write(UserStats)).get(user=user)
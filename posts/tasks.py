@@ -0,0 +1,48 @@
+"""Фоновые задачи приложения. Модуль импортируется в PostsConfig.ready,
+чтобы задачи были зарегистрированы и в веб-процессе, и в воркере."""
+from . import caching, notifications, stats, thumbnails, timeline
+from .models import Follow, Post
+from .queue import task
+from .signals import post_scopes
+
+
+@task('timeline.fan_out', priority=10)
+def fan_out(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None:
+        return
+    timeline.fan_out(post)
+    # Ленты подписчиков могли закэшироваться до раздачи поста.
+    caching.bump(*post_scopes(post))
+
+
+@task('timeline.backfill', priority=10)
+def backfill(user_id, author_id):
+    # Пока задача ждала очереди, подписку могли отменить.
+    if not Follow.objects.filter(user_id=user_id,
+                                 author_id=author_id).exists():
+        return
+    timeline.backfill(user_id, author_id)
+    caching.bump(f'follow:{user_id}')
+
+
+@task('thumbnails.generate')
+def generate_thumbnails(post_id):
+    thumbnails.generate(post_id)
+
+
+@task('stats.reconcile', priority=-10)
+def reconcile_stats():
+    stats.reconcile()
+
+
+@task('notifications.fan_out')
+def notify_followers(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        notifications.fan_out(post)
+
+
+@task('notifications.digest', priority=-5)
+def send_digests():
+    notifications.send_digests()
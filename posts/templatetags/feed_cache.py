@@ -0,0 +1,30 @@
+from django import template
+
+register = template.Library()
+
+
+class FeedCacheNode(template.Node):
+    def __init__(self, nodelist, fragment):
+        self.nodelist = nodelist
+        self.fragment = fragment
+
+    def render(self, context):
+        fragment = self.fragment.resolve(context)
+        html = fragment.get()
+        if html is None:
+            html = self.nodelist.render(context)
+            fragment.set(html)
+        return html
+
+
+@register.tag
+def feedcache(parser, token):
+    """{% feedcache feed %}...{% endfeedcache %}, где feed — FeedFragment
+    из контекста представления."""
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' принимает ровно один аргумент")
+    nodelist = parser.parse(('endfeedcache',))
+    parser.delete_first_token()
+    return FeedCacheNode(nodelist, parser.compile_filter(bits[1]))
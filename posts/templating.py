@@ -0,0 +1,34 @@
+import logging
+import os
+
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger(__name__)
+
+
+def template_names(directory):
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.endswith('.html'):
+                path = os.path.relpath(os.path.join(root, name), directory)
+                yield path.replace(os.sep, '/')
+
+
+def warm_up():
+    """Компилирует все шаблоны из DIRS, чтобы кэширующий загрузчик был
+    заполнен до первого запроса. Возвращает число шаблонов."""
+    compiled = 0
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        for directory in backend.engine.dirs:
+            for name in template_names(directory):
+                try:
+                    backend.engine.get_template(name)
+                except TemplateSyntaxError:
+                    logger.exception('Не удалось скомпилировать шаблон %s',
+                                     name)
+                else:
+                    compiled += 1
+    return compiled
@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Andrey')
+        cls.reader = User.objects.create(username='Pavel')
+        cls.group = Group.objects.create(title='Группа', slug='group-slug')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ApiTest.reader)
+
+    def test_feeds(self):
+        """Ленты отдаются в JSON"""
+        post = Post.objects.create(text='Пост', author=ApiTest.author,
+                                   group=ApiTest.group)
+        Comment.objects.create(post=post, text='Комментарий',
+                               author=ApiTest.reader)
+        urls = (
+            reverse('api_posts'),
+            reverse('api_group_posts', kwargs={'slug': ApiTest.group.slug}),
+            reverse('api_profile', kwargs={
+                'username': ApiTest.author.username}),
+            reverse('api_follow'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                data = self.authorized_client.get(url).json()
+                self.assertEqual(data['results'], [{
+                    'id': post.id,
+                    'text': 'Пост',
+                    'pub_date': post.pub_date.isoformat(),
+                    'author': 'Andrey',
+                    'group': 'group-slug',
+                    'image': None,
+                    'comments': 1,
+                }])
+                self.assertIsNone(data['next'])
+
+    def test_cursor_pages(self):
+        """Страницы API листаются по ссылке next"""
+        for i in range(13):
+            Post.objects.create(text=f'Пост {i}', author=ApiTest.author)
+        first = self.guest_client.get(reverse('api_posts')).json()
+        second = self.guest_client.get(first['next']).json()
+        self.assertEqual(len(first['results']), 10)
+        self.assertEqual([row['text'] for row in second['results']],
+                         ['Пост 2', 'Пост 1', 'Пост 0'])
+
+    def test_not_modified(self):
+        """Неизменившаяся лента отдаёт 304, правка поста меняет ETag"""
+        post = Post.objects.create(text='Пост', author=ApiTest.author)
+        response = self.guest_client.get(reverse('api_posts'))
+        etag = response['ETag']
+        self.assertFalse(response.has_header('Last-Modified'))
+        response = self.guest_client.get(reverse('api_posts'),
+                                         HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        post.text = 'Исправленный пост'
+        post.save()
+        response = self.guest_client.get(reverse('api_posts'),
+                                         HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_follow_requires_login(self):
+        """Лента подписок недоступна анониму"""
+        response = self.guest_client.get(reverse('api_follow'))
+        self.assertEqual(response.status_code, 401)
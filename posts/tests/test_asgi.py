@@ -0,0 +1,147 @@
+import asyncio
+import threading
+from unittest import mock
+
+from django.conf import settings
+from django.middleware.csrf import _get_new_csrf_token
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from yatube.handlers import ASGIHandler
+
+from .. import exporter
+from ..models import Comment, Post, User
+
+
+def request(handler, method, path, headers=(), chunks=(b'',)):
+    """Прогоняет запрос через ASGI-приложение, тело приходит кусками."""
+    messages = [{'type': 'http.request', 'body': chunk,
+                 'more_body': i < len(chunks) - 1}
+                for i, chunk in enumerate(chunks)]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': method, 'path': path,
+             'query_string': b'', 'server': ('testserver', 80),
+             'headers': [(b'host', b'testserver'), *headers]}
+    asyncio.run(handler(scope, receive, send))
+    return sent
+
+
+class ASGIHandlerTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Andrey')
+        cls.post = Post.objects.create(text='Пост через ASGI',
+                                       author=cls.author)
+        cls.handler = ASGIHandler(workers=0)
+
+    def test_get(self):
+        """Страница отдаётся через ASGI с заголовками Django"""
+        start, body = request(ASGIHandlerTest.handler, 'GET',
+                              reverse('index'))
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'content-type', b'text/html; charset=utf-8'),
+                      start['headers'])
+        self.assertIn('Пост через ASGI', body['body'].decode())
+
+    def post_comment(self, text, content_length=True):
+        client = Client()
+        client.force_login(ASGIHandlerTest.author)
+        session = client.cookies[settings.SESSION_COOKIE_NAME].value
+        token = _get_new_csrf_token()
+        cookie = (f'{settings.SESSION_COOKIE_NAME}={session}; '
+                  f'{settings.CSRF_COOKIE_NAME}={token}')
+        body = f'csrfmiddlewaretoken={token}&text={text}'.encode()
+        headers = [
+            (b'content-type', b'application/x-www-form-urlencoded'),
+            (b'cookie', cookie.encode()),
+        ]
+        if content_length:
+            headers.append((b'content-length', str(len(body)).encode()))
+        start, _ = request(
+            ASGIHandlerTest.handler, 'POST',
+            reverse('add_comment', kwargs={
+                'username': ASGIHandlerTest.author.username,
+                'post_id': ASGIHandlerTest.post.id}),
+            headers=headers, chunks=[body[:10], body[10:20], body[20:]])
+        self.assertEqual(start['status'], 302)
+        self.assertTrue(Comment.objects.filter(text=text).exists())
+
+    def test_post_body_in_chunks(self):
+        """Тело, пришедшее несколькими сообщениями, собирается целиком"""
+        self.post_comment('Комментарий')
+
+    def test_post_without_content_length(self):
+        """Тело chunked-запроса без content-length не теряется"""
+        self.post_comment('Без длины', content_length=False)
+
+    def test_disconnect_before_body(self):
+        """Если клиент ушёл, не дослав тело, ответа нет"""
+        handler = ASGIHandlerTest.handler
+        sent = []
+
+        async def receive():
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(handler({'type': 'http', 'method': 'POST',
+                             'path': reverse('index')}, receive, send))
+        self.assertEqual(sent, [])
+
+    def test_lifespan(self):
+        """Сервер получает подтверждение запуска и остановки"""
+        messages = [{'type': 'lifespan.startup'},
+                    {'type': 'lifespan.shutdown'}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.run(ASGIHandler(workers=1)({'type': 'lifespan'},
+                                           receive, send))
+        self.assertEqual(sent, ['lifespan.startup.complete',
+                                'lifespan.shutdown.complete'])
+
+
+class ASGIStreamingTest(TransactionTestCase):
+    def test_stream_is_read_on_one_thread(self):
+        """Потоковая выгрузка читается и закрывается одним потоком пула"""
+        author = User.objects.create(username='Andrey')
+        for i in range(20):
+            Post.objects.create(text=f'Пост {i}', author=author)
+        client = Client()
+        client.force_login(author)
+        cookie = (f'{settings.SESSION_COOKIE_NAME}='
+                  f'{client.cookies[settings.SESSION_COOKIE_NAME].value}')
+        readers = set()
+        rows = exporter.rows
+
+        def tracked_rows(*args):
+            for row in rows(*args):
+                readers.add(threading.get_ident())
+                yield row
+
+        handler = ASGIHandler(workers=4)
+        with mock.patch.object(exporter, 'CHUNK_SIZE', 3), \
+                mock.patch.object(exporter, 'rows', tracked_rows):
+            sent = request(handler, 'GET', reverse('export'),
+                           headers=[(b'cookie', cookie.encode())])
+        handler.executor.shutdown()
+        self.assertEqual(sent[0]['status'], 200)
+        body = b''.join(message.get('body', b'') for message in sent[1:])
+        self.assertEqual(body.decode().count('"type": "post"'), 20)
+        self.assertFalse(sent[-1].get('more_body', False))
+        self.assertEqual(len(readers), 1)
+        self.assertNotEqual(readers, {threading.get_ident()})
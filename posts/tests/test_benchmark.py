@@ -0,0 +1,46 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import benchmark
+from ..models import Follow, Post, TimelineEntry, UserStats
+
+
+class BenchmarkTest(TestCase):
+    def test_seed_and_run(self):
+        """Данные генерируются согласованно, все сценарии замеряются"""
+        dataset = benchmark.seed(users=20, groups=3, posts=60, comments=40,
+                                 follows=4)
+        self.assertEqual(Post.objects.count(), 60)
+        self.assertEqual(Follow.objects.count(), dataset['follows'])
+        self.assertEqual(UserStats.objects.count(), 20)
+        self.assertTrue(TimelineEntry.objects.exists())
+        results = benchmark.run(iterations=2, warmup=0)
+        self.assertEqual(set(results), {
+            'index', 'group_posts', 'profile', 'post_view', 'follow_index',
+            'add_comment', 'profile_follow'})
+        for name, result in results.items():
+            with self.subTest(scenario=name):
+                self.assertGreater(result['queries'], 0)
+                self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+
+    def test_percentile(self):
+        """Перцентиль считается по ближайшему рангу"""
+        values = list(range(1, 101))
+        self.assertEqual(benchmark.percentile(values, 50), 50)
+        self.assertEqual(benchmark.percentile(values, 99), 99)
+        self.assertEqual(benchmark.percentile([5], 90), 5)
+
+    def test_template_render(self):
+        """Рендер ленты замеряется без кэша шаблонов и с ним"""
+        benchmark.seed(users=5, groups=1, posts=12, comments=5, follows=2)
+        results = benchmark.template_render(iterations=2)
+        self.assertEqual(set(results), {'uncached', 'cached', 'speedup'})
+        self.assertGreater(results['cached']['mean_ms'], 0)
+
+    def test_slow_clients(self):
+        """WSGI и ASGI сравниваются на одном числе потоков"""
+        results = benchmark.slow_clients(reverse('cache_health'), clients=4,
+                                         workers=2, delay=0.01)
+        self.assertEqual(results['clients'], 4)
+        self.assertGreater(results['wsgi']['requests_per_second'], 0)
+        self.assertGreater(results['asgi']['requests_per_second'], 0)
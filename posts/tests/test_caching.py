@@ -0,0 +1,116 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.test import Client, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import caching
+from ..models import Comment, Follow, Group, Post, User
+
+
+class FeedCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Andrey')
+        cls.reader = User.objects.create(username='Pavel')
+        cls.group = Group.objects.create(title='Группа', slug='group-slug')
+        cls.other_group = Group.objects.create(title='Другая группа',
+                                               slug='other-slug')
+        cls.post = Post.objects.create(text='Первый пост', author=cls.author,
+                                       group=cls.group)
+
+    def setUp(self):
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(FeedCacheTest.reader)
+
+    def test_anonymous_visitors_share_cache(self):
+        """Анонимные посетители получают одну запись кэша"""
+        Client().get(reverse('index'))
+        hits = caching.stats()['hits']
+        Client().get(reverse('index'))
+        self.assertEqual(caching.stats()['hits'], hits + 1)
+
+    def test_comment_invalidates_feeds(self):
+        """Новый комментарий сбрасывает кэш лент с этим постом"""
+        group_url = reverse('group', kwargs={'slug': FeedCacheTest.group.slug})
+        self.authorized_client.get(group_url)
+        Comment.objects.create(post=FeedCacheTest.post, text='Комментарий',
+                               author=FeedCacheTest.reader)
+        response = self.authorized_client.get(group_url)
+        self.assertContains(response, 'Комментариев:   1')
+
+    def test_edit_invalidates_old_and_new_group(self):
+        """Перенос поста в другое сообщество обновляет обе ленты"""
+        old_url = reverse('group', kwargs={'slug': FeedCacheTest.group.slug})
+        new_url = reverse('group',
+                          kwargs={'slug': FeedCacheTest.other_group.slug})
+        self.authorized_client.get(old_url)
+        self.authorized_client.get(new_url)
+        post = Post.objects.get(pk=FeedCacheTest.post.pk)
+        post.group = FeedCacheTest.other_group
+        post.save()
+        self.assertNotContains(self.authorized_client.get(old_url),
+                               'Первый пост')
+        self.assertContains(self.authorized_client.get(new_url),
+                            'Первый пост')
+
+    def test_follow_invalidates_follow_feed(self):
+        """Подписка сбрасывает кэш ленты подписок"""
+        self.assertNotContains(
+            self.authorized_client.get(reverse('follow_index')),
+            'Первый пост')
+        Follow.objects.create(user=FeedCacheTest.reader,
+                              author=FeedCacheTest.author)
+        self.assertContains(
+            self.authorized_client.get(reverse('follow_index')),
+            'Первый пост')
+
+    def test_cache_hit_skips_page_query(self):
+        """При попадании в кэш страница ленты из базы не выбирается"""
+        Client().get(reverse('index'))
+        with CaptureQueriesContext(connection) as queries:
+            response = Client().get(reverse('index'))
+        self.assertContains(response, 'Первый пост')
+        self.assertFalse([query for query in queries
+                          if 'posts_comment' in query['sql']])
+
+    def test_unrelated_post_keeps_follow_feed(self):
+        """Пост автора, на которого нет подписки, не сбрасывает ленту
+        подписок, а пост автора из подписок — сбрасывает"""
+        Follow.objects.create(user=FeedCacheTest.reader,
+                              author=FeedCacheTest.author)
+        self.authorized_client.get(reverse('follow_index'))
+        hits = caching.stats()['hits']
+        Post.objects.create(text='Чужой пост', author=FeedCacheTest.reader)
+        self.authorized_client.get(reverse('follow_index'))
+        self.assertEqual(caching.stats()['hits'], hits + 1)
+        Post.objects.create(text='Новый пост', author=FeedCacheTest.author)
+        self.assertContains(
+            self.authorized_client.get(reverse('follow_index')),
+            'Новый пост')
+
+    def test_lost_generation_does_not_reuse_old_entries(self):
+        """Вытесненный счётчик поколения не возвращает старые записи"""
+        first = caching.generations(['global'])
+        caches['counters'].delete(caching.GENERATION_KEY.format('global'))
+        caching.bump('global')
+        self.assertNotEqual(caching.generations(['global']), first)
+
+
+class GenerationCommitTest(TransactionTestCase):
+    def setUp(self):
+        for alias in settings.CACHES:
+            caches[alias].clear()
+
+    def test_generation_moves_again_on_commit(self):
+        """Ключ, под которым закэширована страница до фиксации записи,
+        после фиксации уже не используется"""
+        author = User.objects.create(username='Andrey')
+        with transaction.atomic():
+            Post.objects.create(text='Пост', author=author)
+            before_commit = caching.generations(['global'])
+        self.assertNotEqual(caching.generations(['global']), before_commit)
@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Post, User
+from ..views import COMMENTS_PER_PAGE
+
+TOTAL = COMMENTS_PER_PAGE * 2 + 5
+
+
+class CommentPagesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Andrey')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+        User.objects.bulk_create(
+            [User(username=f'reader{i}') for i in range(5)])
+        readers = list(User.objects.filter(username__startswith='reader'))
+        Comment.objects.bulk_create([
+            Comment(post=cls.post, author=readers[i % len(readers)],
+                    text=f'Комментарий {i}')
+            for i in range(TOTAL)
+        ])
+        cls.kwargs = {'username': cls.author.username,
+                      'post_id': cls.post.id}
+
+    def setUp(self):
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        self.guest_client = Client()
+
+    def test_post_page_embeds_first_comments(self):
+        """На странице поста первые комментарии по порядку и ссылка на
+        следующие"""
+        response = self.guest_client.get(
+            reverse('post', kwargs=CommentPagesTest.kwargs))
+        texts = [comment.text for comment in response.context['comments']]
+        self.assertEqual(texts, [f'Комментарий {i}'
+                                 for i in range(COMMENTS_PER_PAGE)])
+        self.assertTrue(response.context['comments_next'])
+        self.assertContains(response, 'comments-more')
+
+    def test_post_page_queries_do_not_grow(self):
+        """Авторы комментариев не загружаются по одному"""
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(
+                reverse('post', kwargs=CommentPagesTest.kwargs))
+        self.assertLess(len(queries), 15)
+
+    def test_load_more_walks_all_comments(self):
+        """Фрагменты «Показать ещё» отдают остальные комментарии без
+        повторов"""
+        url = self.guest_client.get(
+            reverse('post', kwargs=CommentPagesTest.kwargs)
+        ).context['comments_next']
+        texts = []
+        while url:
+            response = self.guest_client.get(url)
+            texts += [comment.text
+                      for comment in response.context['comments']]
+            url = response.context['comments_next']
+        self.assertEqual(texts, [f'Комментарий {i}' for i in range(
+            COMMENTS_PER_PAGE, TOTAL)])
+
+    def test_json_format(self):
+        """format=json отдаёт комментарии и ссылку на следующую страницу"""
+        response = self.guest_client.get(
+            reverse('post_comments', kwargs=CommentPagesTest.kwargs),
+            {'format': 'json'})
+        data = response.json()
+        self.assertEqual(len(data['results']), COMMENTS_PER_PAGE)
+        self.assertEqual(data['results'][0]['text'], 'Комментарий 0')
+        self.assertTrue(data['next'].startswith('http'))
@@ -0,0 +1,142 @@
+import io
+import os
+import shutil
+import tempfile
+import threading
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test import (Client, SimpleTestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+from PIL import Image
+
+from .. import images
+from ..models import Comment, Post, User, UserStats
+
+THREADS = 8
+WRITES = 25
+
+
+def in_thread(function):
+    """Выполняет function в отдельном потоке со своими соединениями и
+    возвращает результат или пробрасывает исключение."""
+    result = {}
+
+    def run():
+        try:
+            result['value'] = function()
+        except BaseException as error:
+            result['error'] = error
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+    if 'error' in result:
+        raise result['error']
+    return result.get('value')
+
+
+# Ожидание блокировки — часть теста, в лог медленных запросов не пишем.
+@override_settings(SLOW_REQUEST_MS=60 * 1000)
+class ConcurrentCommentsTest(SimpleTestCase):
+    """Тестовая база живёт в памяти, а блокировки SQLite видны только на
+    файле. Соединения у каждого потока свои, поэтому новые потоки
+    открывают default на файловой базе с боевыми настройками, а
+    комментарии пишутся настоящим add_comment со всеми сигналами."""
+    databases = {'default'}
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.default = connections.databases[DEFAULT_DB_ALIAS]
+        connections.databases[DEFAULT_DB_ALIAS] = {
+            **self.default,
+            'NAME': os.path.join(self.directory, 'db.sqlite3'),
+            'OPTIONS': {
+                'pragmas': {'journal_mode': 'WAL', 'synchronous': 'NORMAL',
+                            'busy_timeout': 10000},
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+        in_thread(lambda: call_command('migrate', verbosity=0))
+        self.users, self.post = in_thread(self.create_data)
+
+    def tearDown(self):
+        connections.databases[DEFAULT_DB_ALIAS] = self.default
+        shutil.rmtree(self.directory)
+
+    def create_data(self):
+        author = User.objects.create(username='Andrey')
+        post = Post.objects.create(text='Пост', author=author)
+        users = [User.objects.create(username=f'Reader{n}')
+                 for n in range(THREADS)]
+        return users, post
+
+    def test_parallel_comments_do_not_lock(self):
+        """Параллельные комментарии через add_comment не падают с
+        «database is locked»"""
+        url = reverse('add_comment', kwargs={'username': 'Andrey',
+                                             'post_id': self.post.id})
+        errors = []
+
+        def worker(user):
+            client = Client(raise_request_exception=True)
+            client.force_login(user)
+            try:
+                for i in range(WRITES):
+                    response = client.post(url, {'text': f'№{i}'})
+                    if response.status_code != 302:
+                        errors.append(response.status_code)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(user,))
+                   for user in self.users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        comments, counted = in_thread(lambda: (
+            Comment.objects.count(),
+            sum(UserStats.objects.filter(
+                user__in=self.users).values_list('comments', flat=True))))
+        self.assertEqual(comments, THREADS * WRITES)
+        self.assertEqual(counted, THREADS * WRITES)
+
+
+class WriteLockScopeTest(TransactionTestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.media)
+
+    def test_image_is_processed_outside_transaction(self):
+        """Картинка обрабатывается до BEGIN IMMEDIATE, а не под
+        блокировкой записи"""
+        in_transaction = []
+        original = images.normalize
+
+        def normalize(image):
+            in_transaction.append(connection.in_atomic_block)
+            return original(image)
+
+        buffer = io.BytesIO()
+        Image.new('RGB', (100, 100), 'red').save(buffer, 'JPEG')
+        client = Client()
+        client.force_login(User.objects.create(username='Andrey'))
+        with override_settings(MEDIA_ROOT=self.media), \
+                mock.patch('posts.forms.images.normalize', normalize):
+            client.post(reverse('new_post'),
+                        {'text': 'Фото', 'image': SimpleUploadedFile(
+                            'photo.jpg', buffer.getvalue())})
+        self.assertEqual(in_transaction, [False])
+        self.assertTrue(Post.objects.filter(text='Фото').exists())
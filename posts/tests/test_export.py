@@ -0,0 +1,134 @@
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+
+class ExportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Andrey')
+        cls.reader = User.objects.create(username='Pavel')
+        cls.group = Group.objects.create(title='Коты', slug='cats')
+        cls.post = Post.objects.create(text='Пост', author=cls.author,
+                                       group=cls.group)
+        Post.objects.create(text='Чужой пост', author=cls.reader)
+        Comment.objects.create(post=cls.post, author=cls.reader,
+                               text='Комментарий')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_export_jsonl_with_filters(self):
+        """Выгрузка по автору содержит его посты, комментарии к ним
+        и подписки"""
+        out = io.StringIO()
+        call_command('export_posts', author='Andrey', stdout=out)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([row['type'] for row in rows],
+                         ['user', 'user', 'group', 'post', 'comment',
+                          'follow'])
+        self.assertEqual({row['username'] for row in rows[:2]},
+                         {'Andrey', 'Pavel'})
+        self.assertEqual(rows[2]['slug'], 'cats')
+        self.assertEqual(rows[3]['id'], ExportPostsTest.post.id)
+        self.assertEqual(rows[3]['group'], 'cats')
+        self.assertEqual(rows[4]['post'], ExportPostsTest.post.id)
+        self.assertIsNone(rows[4]['parent'])
+        self.assertEqual(rows[5], {'type': 'follow', 'user': 'Pavel',
+                                   'author': 'Andrey'})
+
+    def test_export_gzip_csv_can_be_imported(self):
+        """Сжатый CSV читается обратно командой import_posts"""
+        path = os.path.join(self.directory, 'posts.csv.gz')
+        call_command('export_posts', output=path, type=['post'])
+        with gzip.open(path, 'rt', encoding='utf-8') as archive:
+            rows = list(csv.DictReader(archive))
+        self.assertEqual({row['text'] for row in rows},
+                         {'Пост', 'Чужой пост'})
+        Post.objects.all().delete()
+        call_command('import_posts', path, stdout=io.StringIO())
+        self.assertEqual(Post.objects.get(text='Пост').pk,
+                         ExportPostsTest.post.pk)
+
+    def test_user_download(self):
+        """Пользователь скачивает свои данные потоковым ответом"""
+        client = Client()
+        client.force_login(ExportPostsTest.reader)
+        response = client.get(reverse('export'))
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in b''.join(
+            response.streaming_content).decode().splitlines()]
+        self.assertEqual(
+            [(row['type'], row.get('text')) for row in rows],
+            [('user', None), ('user', None), ('post', 'Чужой пост'),
+             ('comment', 'Комментарий'), ('follow', None)])
+
+    def test_admin_action(self):
+        """Действие админки выгружает выбранные посты с комментариями,
+        авторами и группами"""
+        admin = User.objects.create(username='root', is_staff=True,
+                                    is_superuser=True)
+        client = Client()
+        client.force_login(admin)
+        response = client.post(reverse('admin:posts_post_changelist'), {
+            'action': 'export_posts',
+            '_selected_action': [ExportPostsTest.post.id],
+        })
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in b''.join(
+            response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['type'] for row in rows],
+                         ['user', 'user', 'group', 'post', 'comment'])
+        self.assertEqual(rows[3]['id'], ExportPostsTest.post.id)
+
+    def test_round_trip_into_empty_database(self):
+        """Полная выгрузка загружается в пустую базу вместе с ветками
+        комментариев"""
+        reply = Comment.objects.create(
+            post=ExportPostsTest.post, author=ExportPostsTest.author,
+            text='Ответ', parent=Comment.objects.get(text='Комментарий'))
+        Comment.objects.create(post=ExportPostsTest.post,
+                               author=ExportPostsTest.reader,
+                               text='Ответ на ответ', parent=reply)
+
+        def snapshot():
+            return (
+                sorted(User.objects.values_list('username', flat=True)),
+                list(Group.objects.values_list('slug', 'title')),
+                list(Post.objects.order_by('id').values_list(
+                    'id', 'author__username', 'group__slug', 'text',
+                    'pub_date')),
+                list(Comment.objects.order_by('id').values_list(
+                    'id', 'post_id', 'parent_id', 'path', 'reply_count',
+                    'author__username', 'text', 'created')),
+                sorted(Follow.objects.values_list('user__username',
+                                                  'author__username')),
+            )
+
+        before = snapshot()
+        path = os.path.join(self.directory, 'all.jsonl')
+        call_command('export_posts', output=path)
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        self.assertFalse(Post.objects.exists())
+        out = io.StringIO()
+        call_command('import_posts', path, stdout=out)
+        for kind in ('user', 'group', 'post', 'comment', 'follow'):
+            self.assertIn(f'{kind}: создано ', out.getvalue())
+        self.assertEqual(out.getvalue().count('пропущено 0'), 5)
+        self.assertEqual(snapshot(), before)
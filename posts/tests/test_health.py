@@ -0,0 +1,69 @@
+import shutil
+import tempfile
+import threading
+
+import fakeredis
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from yatube.settings import CACHE_ALIASES, cache_config
+
+from .. import caching
+from ..models import User
+
+
+class CacheHealthTest(TestCase):
+    def test_health_for_anybody(self):
+        """Проверка кэшей доступна всем, подробности скрыты"""
+        response = Client().get(reverse('cache_health'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'status': 'ok'})
+
+    def test_health_details_for_staff(self):
+        """Сотрудник видит состояние каждого кэша и статистику ленты"""
+        staff = User.objects.create(username='admin', is_staff=True)
+        client = Client()
+        client.force_login(staff)
+        data = client.get(reverse('cache_health')).json()
+        self.assertEqual(set(data['caches']), set(CACHE_ALIASES))
+        self.assertTrue(all(check['ok'] for check in data['caches'].values()))
+        self.assertIn('hit_ratio', data['feed_cache'])
+
+
+class SharedCacheBackendTest(TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_file_backend_is_shared_between_instances(self):
+        """Файловый кэш виден из разных экземпляров бэкенда"""
+        config = {alias: cache_config('file', alias)
+                  for alias in CACHE_ALIASES}
+        for alias in config:
+            config[alias]['LOCATION'] = f'{self.cache_dir}/{alias}'
+        with override_settings(CACHES=config):
+            caching.bump('global')
+            generation = caching.generations(['global'])
+            # Экземпляры кэшей локальны для потока: в другом потоке
+            # бэкенд создаётся заново, как в другом воркере.
+            seen = []
+            worker = threading.Thread(
+                target=lambda: seen.append(caching.generations(['global'])))
+            worker.start()
+            worker.join()
+            self.assertEqual(seen, [generation])
+
+    def test_redis_backend(self):
+        """Счётчики поколений работают поверх Redis-совместимого сервера"""
+        config = {alias: cache_config('redis', alias)
+                  for alias in CACHE_ALIASES}
+        for alias in config:
+            config[alias]['OPTIONS'] = {'CONNECTION_POOL_KWARGS': {
+                'connection_class': fakeredis.FakeConnection}}
+        with override_settings(CACHES=config):
+            first = caching.generations(['global'])
+            caching.bump('global')
+            self.assertEqual(caching.generations(['global']),
+                             [first[0] + 1])
@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Post, User
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Andrey')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ConditionalGetTest.author)
+
+    def test_not_modified_skips_rendering(self):
+        """Повторный запрос с ETag получает 304 без рендера шаблона"""
+        username = ConditionalGetTest.author.username
+        urls = {
+            reverse('index'): 'index.html',
+            reverse('profile', kwargs={'username': username}): 'profile.html',
+            reverse('post', kwargs={
+                'username': username,
+                'post_id': ConditionalGetTest.post.id}): 'post.html',
+        }
+        for url, template in urls.items():
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertTemplateNotUsed(response, template)
+
+    def test_cache_control(self):
+        """Анонимные страницы публичные, страницы пользователя — приватные"""
+        response = self.guest_client.get(reverse('index'))
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('Cookie', response['Vary'])
+        response = self.authorized_client.get(reverse('index'))
+        self.assertIn('private', response['Cache-Control'])
+        self.assertNotEqual(response['ETag'],
+                            self.guest_client.get(reverse('index'))['ETag'])
+
+    def test_if_modified_since_is_ignored(self):
+        """Правка поста не сдвигает время новейшей записи, поэтому
+        If-Modified-Since не даёт 304 со старой страницей"""
+        url = reverse('profile', kwargs={
+            'username': ConditionalGetTest.author.username})
+        response = self.guest_client.get(url)
+        self.assertFalse(response.has_header('Last-Modified'))
+        post = Post.objects.get(pk=ConditionalGetTest.post.pk)
+        post.text = 'Исправленный пост'
+        post.save()
+        response = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Исправленный пост')
+
+    def test_new_comment_changes_etag(self):
+        """Новый комментарий меняет ETag страницы поста"""
+        url = reverse('post', kwargs={
+            'username': ConditionalGetTest.author.username,
+            'post_id': ConditionalGetTest.post.id})
+        etag = self.guest_client.get(url)['ETag']
+        Comment.objects.create(post=ConditionalGetTest.post, text='Новый',
+                               author=ConditionalGetTest.author)
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Новый')
@@ -0,0 +1,79 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ..models import Post, User
+
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def photo(size=(4000, 3000), mode='RGB', image_format='JPEG'):
+    image = Image.new(mode, size, 'red')
+    exif = Image.Exif()
+    exif[0x010F] = 'Camera'
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, exif=exif)
+    return SimpleUploadedFile(f'photo.{image_format.lower()}',
+                              buffer.getvalue())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_MAX_SIZE=(800, 800))
+class ImageUploadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='Andrey')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ImageUploadTest.user)
+
+    def upload(self, image):
+        self.authorized_client.post(reverse('new_post'),
+                                    data={'text': 'Фото', 'image': image})
+        return Post.objects.get(text='Фото')
+
+    def test_upload_is_downscaled_and_reencoded(self):
+        """Картинка уменьшается, пережимается в WEBP и теряет EXIF"""
+        upload = photo()
+        post = self.upload(upload)
+        self.assertTrue(post.image.name.endswith('.webp'))
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.format, 'WEBP')
+            self.assertEqual(image.size, (800, 600))
+            self.assertFalse(image.getexif())
+        self.assertEqual(post.image_original_size, upload.size)
+        self.assertEqual(post.image_size, post.image.size)
+
+    @override_settings(IMAGE_FORMAT='JPEG')
+    def test_transparent_image_to_jpeg(self):
+        """Прозрачная картинка сохраняется в JPEG на белом фоне"""
+        post = self.upload(photo((100, 100), 'RGBA', 'PNG'))
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.format, 'JPEG')
+            self.assertEqual(image.size, (100, 100))
+            self.assertEqual(image.mode, 'RGB')
+
+    def test_missing_webp_encoder_falls_back_to_jpeg(self):
+        """Без кодировщика WEBP картинка сохраняется в JPEG"""
+        Image.init()
+        upload = photo((100, 100))
+        save = {name: handler for name, handler in Image.SAVE.items()
+                if name != 'WEBP'}
+        with mock.patch.dict(Image.SAVE, save, clear=True):
+            post = self.upload(upload)
+        self.assertTrue(post.image.name.endswith('.jpg'))
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.format, 'JPEG')
@@ -0,0 +1,90 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from .. import search
+from ..models import Comment, Follow, Group, Post, TimelineEntry, User
+
+
+class ImportPostsTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as output:
+            output.write(content)
+        return path
+
+    def test_import_jsonl_and_csv(self):
+        """Данные из JSONL и CSV загружаются пачками со ссылками по
+        именам, исходными id и датами"""
+        rows = [
+            {'type': 'user', 'username': 'Andrey'},
+            {'type': 'user', 'username': 'Pavel'},
+            {'type': 'group', 'slug': 'cats', 'title': 'Коты'},
+            {'type': 'follow', 'user': 'Pavel', 'author': 'Andrey'},
+            {'type': 'post', 'id': 42, 'author': 'Andrey', 'group': 'cats',
+             'text': 'Старый пост', 'pub_date': '2020-01-01T10:00:00'},
+            {'type': 'post', 'author': 'Andrey', 'text': 'Новый пост'},
+            {'type': 'comment', 'post': 42, 'author': 'Pavel',
+             'text': 'Комментарий'},
+            {'type': 'comment', 'post': 999, 'author': 'Pavel',
+             'text': 'К несуществующему посту'},
+        ]
+        jsonl = self.write('data.jsonl', '\n'.join(
+            json.dumps(row, ensure_ascii=False) for row in rows))
+        csv = self.write('comments.csv', 'post,author,text\n'
+                                         '42,Andrey,Из CSV\n')
+        out = io.StringIO()
+        call_command('import_posts', jsonl, batch_size=2, stdout=out)
+        call_command('import_posts', csv, type='comment', stdout=out)
+
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(Group.objects.get().title, 'Коты')
+        old = Post.objects.get(pk=42)
+        self.assertEqual(old.group.slug, 'cats')
+        self.assertEqual(old.pub_date.year, 2020)
+        self.assertEqual(Post.objects.get(text='Новый пост').pk, 43)
+        self.assertEqual(Comment.objects.filter(post=old).count(), 2)
+        self.assertTrue(Follow.objects.filter(user__username='Pavel').exists())
+        self.assertEqual(
+            TimelineEntry.objects.filter(user__username='Pavel').count(), 2)
+        self.assertIn(old, search.search('Старый')[0])
+        pavel = User.objects.get(username='Pavel')
+        self.assertEqual((pavel.stats.following, pavel.stats.comments),
+                         (1, 1))
+        self.assertIn('comment: создано 1, пропущено 1', out.getvalue())
+        self.assertIn('строк/с', out.getvalue())
+
+    def test_skipped_rows_are_counted_once(self):
+        """Каждая плохая строка считается пропущенной один раз, а
+        существующая подписка — не созданной"""
+        User.objects.create(username='Andrey')
+        pavel = User.objects.create(username='Pavel')
+        Follow.objects.create(user=pavel, author=User.objects.get(
+            username='Andrey'))
+        rows = [
+            {'type': 'user'},
+            {'type': 'group', 'title': 'Без слага'},
+            {'type': 'post', 'author': 'Nobody', 'text': 'Плохой пост'},
+            {'type': 'post', 'author': 'Andrey', 'text': 'Хороший пост'},
+            {'type': 'follow', 'user': 'Pavel', 'author': 'Andrey'},
+        ]
+        path = self.write('bad.jsonl', '\n'.join(
+            json.dumps(row, ensure_ascii=False) for row in rows))
+        out = io.StringIO()
+        call_command('import_posts', path, stdout=out)
+        output = out.getvalue()
+        self.assertIn('user: создано 0, пропущено 1', output)
+        self.assertIn('group: создано 0, пропущено 1', output)
+        self.assertIn('post: создано 1, пропущено 1', output)
+        self.assertIn('follow: создано 0, пропущено 1', output)
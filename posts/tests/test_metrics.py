@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import metrics
+from ..models import Post, User
+
+
+class RequestMetricsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='Andrey')
+        cls.staff = User.objects.create(username='Admin', is_staff=True)
+        Post.objects.create(text='Пост', author=cls.user)
+
+    def setUp(self):
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        metrics.reset()
+        self.guest_client = Client()
+
+    def test_server_timing(self):
+        """В ответе есть Server-Timing с SQL, шаблонами и кэшем"""
+        response = self.guest_client.get(reverse('index'))
+        timing = response['Server-Timing']
+        for part in ('sql;dur=', 'tpl;dur=', 'cache;desc="hits=0 misses=1"',
+                     'total;dur='):
+            with self.subTest(part=part):
+                self.assertIn(part, timing)
+
+    def test_metrics_endpoint(self):
+        """Гистограммы доступны персоналу в формате Prometheus"""
+        self.guest_client.get(reverse('index'))
+        self.assertEqual(self.guest_client.get(reverse('metrics')).status_code,
+                         403)
+        staff_client = Client()
+        staff_client.force_login(RequestMetricsTest.staff)
+        response = staff_client.get(reverse('metrics'))
+        self.assertContains(
+            response, 'yatube_request_duration_seconds_count{view="index"} 1')
+        self.assertContains(
+            response,
+            'yatube_feed_cache_total{view="index",outcome="misses"} 1')
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_token(self):
+        """Prometheus может читать метрики по токену"""
+        response = self.guest_client.get(reverse('metrics'),
+                                         HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        response = self.guest_client.get(reverse('metrics'),
+                                         HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(SLOW_REQUEST_MS=0)
+    def test_slow_request_is_logged(self):
+        """Медленный запрос пишется в лог вместе с SQL"""
+        with self.assertLogs('posts.slow_requests', 'WARNING') as logs:
+            self.guest_client.get(reverse('index'))
+        self.assertIn('SELECT', logs.output[0])
@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+from django.core import mail
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import notifications
+from ..models import Follow, Notification, Post, User
+
+
+def later(seconds=3600):
+    return timezone.now() + timedelta(seconds=seconds)
+
+
+@override_settings(NOTIFICATION_DIGEST_WINDOW=3600,
+                   NOTIFICATION_DIGEST_MAX_POSTS=2,
+                   NOTIFICATION_BATCH_SIZE=2)
+class NotificationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Andrey')
+        cls.readers = [
+            User.objects.create(username=f'Reader{i}',
+                                email=f'reader{i}@example.com')
+            for i in range(5)]
+        Follow.objects.bulk_create([Follow(user=reader, author=cls.author)
+                                    for reader in cls.readers])
+
+    def publish(self, text):
+        return Post.objects.create(text=text,
+                                   author=NotificationTest.author)
+
+    def test_post_notifies_followers(self):
+        """Новый пост попадает во входящие каждого подписчика"""
+        post = self.publish('Пост')
+        self.assertEqual(
+            set(Notification.objects.filter(post=post).values_list(
+                'user_id', flat=True)),
+            {reader.id for reader in NotificationTest.readers})
+
+    def test_digest_coalesces_posts(self):
+        """Несколько постов уходят одному читателю одним письмом, и
+        только по истечении окна"""
+        for i in range(3):
+            self.publish(f'Пост {i}')
+        self.assertEqual(notifications.send_digests(), 0)
+        self.assertEqual(notifications.send_digests(later()), 5)
+        self.assertEqual(len(mail.outbox), 5)
+        message = mail.outbox[0]
+        self.assertEqual(message.subject, 'Новые записи (3) на Yatube')
+        self.assertIn('Пост 2', message.body)
+        self.assertIn('И ещё записей: 1.', message.body)
+        self.assertEqual(notifications.send_digests(later()), 0)
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_read_notifications_are_not_emailed(self):
+        """Прочитанное во входящих в дайджест не попадает"""
+        self.publish('Пост')
+        client = Client()
+        client.force_login(NotificationTest.readers[0])
+        response = client.get(reverse('notifications'))
+        self.assertContains(response, 'Пост')
+        self.assertFalse(Notification.objects.filter(
+            user=NotificationTest.readers[0], read=False).exists())
+        self.assertEqual(notifications.send_digests(later()), 4)
+        self.assertNotIn(NotificationTest.readers[0].email,
+                         [message.to[0] for message in mail.outbox])
+
+    def test_queries_do_not_grow_with_followers(self):
+        """Число запросов зависит от числа пачек, а не от подписчиков"""
+        self.publish('Пост')
+        # 5 получателей пачками по 2: три пачки и пустая в конце.
+        with self.assertNumQueries(4 + 3 * 2):
+            notifications.send_digests(later())
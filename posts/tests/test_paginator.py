@@ -35,5 +35,45 @@ class PaginatorViewsTest(TestCase):
 
     def test_second_page_containse_three_records(self):
         """Вторая стрница содержит 3 записи из 13"""
-        response = self.authorized_client.get(reverse('index') + '?page=2')
+        first = self.authorized_client.get(reverse('index'))
+        response = self.authorized_client.get(
+            reverse('index') + '?cursor=' +
+            first.context.get('page').next_cursor)
+        self.assertEqual(len(response.context.get('page').object_list), 3)
+        self.assertEqual(response.context.get('page').next_cursor, '')
+
+    def test_previous_cursor_returns_first_page(self):
+        """Ссылка «Предыдущая» со второй страницы ведёт на первую"""
+        first = self.authorized_client.get(reverse('index'))
+        second = self.authorized_client.get(
+            reverse('index') + '?cursor=' +
+            first.context.get('page').next_cursor)
+        response = self.authorized_client.get(
+            reverse('index') + '?cursor=' +
+            second.context.get('page').previous_cursor)
+        self.assertEqual(list(response.context.get('page').object_list),
+                         list(first.context.get('page').object_list))
+        self.assertEqual(response.context.get('page').previous_cursor, '')
+
+    def test_pages_do_not_overlap(self):
+        """Страницы ленты не пересекаются и покрывают все записи"""
+        first = self.guest_client.get(reverse('index')).context['page']
+        second = self.guest_client.get(
+            reverse('index') + '?cursor=' + first.next_cursor
+        ).context['page']
+        ids = [post.id for post in first] + [post.id for post in second]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(len(ids), Post.objects.count())
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Испорченный курсор не ломает страницу"""
+        response = self.guest_client.get(reverse('index') + '?cursor=!!!')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context.get('page').object_list), 10)
+
+    def test_group_second_page(self):
+        """Лента сообщества листается дальше первых 10 записей"""
+        url = reverse('group', kwargs={'slug': PaginatorViewsTest.group.slug})
+        first = self.guest_client.get(url).context['page']
+        response = self.guest_client.get(url + '?cursor=' + first.next_cursor)
         self.assertEqual(len(response.context.get('page').object_list), 3)
@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+
+class FeedQueryCountTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Andrey')
+        cls.reader = User.objects.create(username='Pavel')
+        cls.group = Group.objects.create(title='Группа', slug='group-slug')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(FeedQueryCountTest.reader)
+
+    def add_posts(self, count):
+        for i in range(count):
+            post = Post.objects.create(text=f'Пост {i}',
+                                       author=FeedQueryCountTest.author,
+                                       group=FeedQueryCountTest.group)
+            Comment.objects.create(post=post, text='Комментарий',
+                                   author=FeedQueryCountTest.reader)
+
+    def count_queries(self, url):
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_feed_query_count_does_not_depend_on_page_size(self):
+        """Число запросов ленты не зависит от числа постов на странице"""
+        urls = (
+            reverse('index'),
+            reverse('group', kwargs={'slug': FeedQueryCountTest.group.slug}),
+            reverse('profile', kwargs={
+                'username': FeedQueryCountTest.author.username}),
+            reverse('follow_index'),
+        )
+        self.add_posts(1)
+        single = {url: self.count_queries(url) for url in urls}
+        self.add_posts(9)
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), single[url])
+
+    def test_comment_count_is_annotated(self):
+        """Число комментариев берётся из аннотации comment_count"""
+        self.add_posts(2)
+        response = self.authorized_client.get(reverse('index'))
+        for post in response.context['page']:
+            self.assertEqual(post.comment_count, 1)
+        self.assertContains(response, 'Комментариев:   1', count=2)
@@ -0,0 +1,80 @@
+import re
+
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+FULL_SCAN = re.compile(r'\bSCAN (TABLE )?(?P<table>\w+)$')
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+def query_plan(sql):
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+class FeedQueryPlanTest(TestCase):
+    """Каждый запрос лент должен идти по индексу: без полного
+    сканирования таблиц и без сортировки во временном B-дереве."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Andrey')
+        cls.reader = User.objects.create(username='Pavel')
+        cls.group = Group.objects.create(title='Группа', slug='group-slug')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for i in range(15):
+            post = Post.objects.create(text=f'Пост {i}', author=cls.author,
+                                       group=cls.group)
+            Comment.objects.create(post=post, text='Комментарий',
+                                   author=cls.reader)
+        cls.post = post
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(FeedQueryPlanTest.reader)
+
+    def feed_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(url)
+            if response.context and response.context.get('page'):
+                next_cursor = response.context['page'].next_cursor
+                self.authorized_client.get(url + '?cursor=' + next_cursor)
+        return [query['sql'] for query in queries
+                if query['sql'].startswith('SELECT')]
+
+    def test_plan_checks_detect_full_scan(self):
+        """Проверка плана ловит запрос без подходящего индекса"""
+        plan = query_plan('SELECT id FROM posts_post ORDER BY text')
+        self.assertTrue([step for step in plan if FULL_SCAN.search(step)])
+        self.assertTrue([step for step in plan if TEMP_SORT in step])
+
+    def test_feed_queries_use_indexes(self):
+        """Запросы лент, их вторых страниц, страницы поста и его
+        комментариев идут по индексам"""
+        urls = (
+            reverse('index'),
+            reverse('group', kwargs={'slug': FeedQueryPlanTest.group.slug}),
+            reverse('profile', kwargs={
+                'username': FeedQueryPlanTest.author.username}),
+            reverse('follow_index'),
+            reverse('post', kwargs={
+                'username': FeedQueryPlanTest.author.username,
+                'post_id': FeedQueryPlanTest.post.id}),
+            reverse('post_comments', kwargs={
+                'username': FeedQueryPlanTest.author.username,
+                'post_id': FeedQueryPlanTest.post.id}),
+        )
+        for url in urls:
+            for sql in self.feed_queries(url):
+                plan = query_plan(sql)
+                with self.subTest(url=url, sql=sql, plan=plan):
+                    self.assertFalse(
+                        [step for step in plan if FULL_SCAN.search(step)])
+                    self.assertFalse(
+                        [step for step in plan if TEMP_SORT in step])
@@ -0,0 +1,125 @@
+from datetime import timedelta
+
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import queue
+from ..models import Follow, Task, TimelineEntry, User
+
+calls = []
+
+
+@queue.task('test.record')
+def record(value):
+    calls.append(value)
+
+
+@queue.task('test.tick')
+def tick():
+    calls.append('tick')
+
+
+@queue.task('test.fail', max_attempts=2)
+def fail():
+    raise RuntimeError('сбой')
+
+
+@override_settings(TASKS_EAGER=False, TASK_SCHEDULE={'test.tick': 60})
+class TaskQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def work(self):
+        return queue.Worker(threads=1).run(once=True)
+
+    def test_priority_order(self):
+        """Задачи выполняются по приоритету, затем по порядку постановки"""
+        queue.enqueue('test.record', 'обычная')
+        queue.enqueue('test.record', 'срочная', priority=10)
+        queue.enqueue('test.record', 'ещё обычная')
+        self.work()
+        self.assertEqual([call for call in calls if call != 'tick'],
+                         ['срочная', 'обычная', 'ещё обычная'])
+        self.assertFalse(Task.objects.exclude(status=Task.DONE).exists())
+
+    def test_scheduled_task_waits(self):
+        """Задача с run_at в будущем не выполняется раньше срока"""
+        queue.enqueue('test.record', 'потом',
+                      run_at=timezone.now() + timedelta(hours=1))
+        self.work()
+        self.assertNotIn('потом', calls)
+
+    def test_retry_with_backoff(self):
+        """Упавшая задача откладывается, после последней попытки — ошибка"""
+        task = queue.enqueue('test.fail')
+        self.work()
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.QUEUED)
+        self.assertEqual(task.attempts, 1)
+        self.assertGreater(task.run_at, timezone.now())
+        self.assertIn('сбой', task.last_error)
+        Task.objects.filter(pk=task.pk).update(run_at=timezone.now())
+        with self.assertLogs('posts.queue', 'ERROR'):
+            self.work()
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.FAILED)
+
+    def test_periodic_tasks_are_not_duplicated(self):
+        """Периодическая задача ставится один раз на интервал"""
+        now = timezone.now()
+        queue.schedule_periodic(now)
+        queue.schedule_periodic(now)
+        self.assertEqual(Task.objects.filter(name='test.tick').count(), 1)
+
+    def test_stale_task_is_released(self):
+        """Задача упавшего воркера возвращается в очередь"""
+        task = queue.enqueue('test.record', 'зависшая')
+        Task.objects.filter(pk=task.pk).update(
+            status=Task.RUNNING,
+            locked_at=timezone.now() - timedelta(days=1))
+        self.work()
+        self.assertIn('зависшая', calls)
+
+    def test_late_worker_result_is_discarded(self):
+        """Воркер, чью задачу вернули в очередь, не записывает результат
+        поверх нового захвата"""
+        queue.enqueue('test.record', 'долгая')
+        [late] = queue.claim('late')
+        Task.objects.filter(pk=late.pk).update(
+            locked_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(queue.release_stale(), 1)
+        [fresh] = queue.claim('fresh')
+        self.assertNotEqual(fresh.lease, late.lease)
+        with self.assertLogs('posts.queue', 'WARNING'):
+            self.assertFalse(queue.execute(late))
+        fresh.refresh_from_db()
+        self.assertEqual((fresh.status, fresh.locked_by),
+                         (Task.RUNNING, 'fresh'))
+        self.assertTrue(queue.execute(fresh))
+        self.assertEqual(Task.objects.get(pk=fresh.pk).status, Task.DONE)
+        self.assertEqual(queue.claim('other'), [])
+
+    def test_follow_side_effects_run_in_worker(self):
+        """Наполнение ленты при подписке выполняет воркер, а не запрос"""
+        author = User.objects.create(username='Andrey')
+        reader = User.objects.create(username='Pavel')
+        client = Client()
+        client.force_login(author)
+        client.post(reverse('new_post'), {'text': 'Пост'})
+        client.force_login(reader)
+        client.get(reverse('profile_follow', kwargs={
+            'username': author.username}))
+        self.assertTrue(Follow.objects.filter(user=reader).exists())
+        self.assertFalse(TimelineEntry.objects.filter(user=reader).exists())
+        self.work()
+        self.assertTrue(TimelineEntry.objects.filter(user=reader).exists())
+
+
+class EagerTaskTest(TestCase):
+    def test_eager_runs_immediately(self):
+        """С TASKS_EAGER задача выполняется при постановке"""
+        calls.clear()
+        self.assertIsNone(queue.enqueue('test.record', 'сразу'))
+        self.assertEqual(calls, ['сразу'])
+        self.assertFalse(Task.objects.exists())
@@ -0,0 +1,113 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import caching
+from ..models import Post, User, UserStats
+from ..routers import ReplicaRouter
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTest(TestCase):
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Andrey')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ReplicaRoutingTest.author)
+
+    def replica_queries(self, client, url):
+        with CaptureQueriesContext(connections['replica']) as captured:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(captured)
+
+    def test_feeds_read_from_replica(self):
+        """Ленты, профиль и API читаются с реплики"""
+        urls = (
+            reverse('index'),
+            reverse('profile', kwargs={
+                'username': ReplicaRoutingTest.author.username}),
+            reverse('api_posts'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertGreater(
+                    self.replica_queries(self.guest_client, url), 0)
+
+    def test_forms_use_primary(self):
+        """Страницы с формами не читают с реплики"""
+        self.assertEqual(self.replica_queries(self.authorized_client,
+                                              reverse('new_post')), 0)
+
+    def test_write_pins_client_to_primary(self):
+        """После записи клиент читает только основную базу"""
+        response = self.authorized_client.post(
+            reverse('add_comment', kwargs={
+                'username': ReplicaRoutingTest.author.username,
+                'post_id': ReplicaRoutingTest.post.id}),
+            {'text': 'Комментарий'})
+        self.assertIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+        self.assertEqual(self.replica_queries(self.authorized_client,
+                                              reverse('index')), 0)
+
+    def test_reads_do_not_pin(self):
+        """Чтение не закрепляет клиента за основной базой"""
+        response = self.guest_client.get(reverse('index'))
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+
+    def test_session_and_user_read_from_primary(self):
+        """Сессия и пользователь не читаются с отстающей реплики"""
+        caches[settings.SESSION_CACHE_ALIAS].clear()
+        with CaptureQueriesContext(connections['replica']) as replica, \
+                CaptureQueriesContext(connections['default']) as primary:
+            self.authorized_client.get(reverse('index'))
+        self.assertTrue([query for query in primary
+                         if 'django_session' in query['sql']])
+        self.assertFalse([query for query in replica
+                          if 'django_session' in query['sql'] or
+                          'FROM "auth_user"' in query['sql']])
+
+    def test_missing_stats_read_back_from_primary(self):
+        """Созданная на лету строка счётчиков читается с основной базы"""
+        UserStats.objects.filter(user=ReplicaRoutingTest.author).delete()
+        with CaptureQueriesContext(connections['default']) as primary:
+            response = self.guest_client.get(reverse('profile', kwargs={
+                'username': ReplicaRoutingTest.author.username}))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue([query for query in primary
+                         if query['sql'].startswith('SELECT') and
+                         'posts_userstats' in query['sql']])
+
+    def test_fresh_feed_is_not_cached_from_replica(self):
+        """Ленту с реплики не кэшируем, пока реплика может отставать
+        от последней записи"""
+        Post.objects.create(text='Новый пост',
+                            author=ReplicaRoutingTest.author)
+        self.guest_client.get(reverse('index'))
+        hits = caching.stats()['hits']
+        self.guest_client.get(reverse('index'))
+        self.assertEqual(caching.stats()['hits'], hits)
+        caches[settings.FEED_COUNTERS_ALIAS].delete(
+            caching.RECENT_KEY.format('global'))
+        self.guest_client.get(reverse('index'))
+        self.guest_client.get(reverse('index'))
+        self.assertEqual(caching.stats()['hits'], hits + 1)
+
+    def test_replica_object_saved_to_primary(self):
+        """Объект, прочитанный с реплики, сохраняется в основную базу"""
+        post = Post.objects.using('replica').get(pk=ReplicaRoutingTest.post.pk)
+        self.assertEqual(
+            ReplicaRouter().db_for_write(Post, instance=post),
+            DEFAULT_DB_ALIAS)
@@ -0,0 +1,80 @@
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import search
+from ..models import Group, Post, User
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Andrey')
+        cls.group = Group.objects.create(title='Кулинария', slug='cooking')
+        cls.soup = Post.objects.create(text='Рецепт борща', author=cls.author,
+                                       group=cls.group)
+        cls.travel = Post.objects.create(text='Поездка на Байкал',
+                                         author=User.objects.create(
+                                             username='Pavel'))
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def found(self, query):
+        response = self.guest_client.get(reverse('search'), {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return list(response.context['page'])
+
+    def test_search_by_text_group_and_author(self):
+        """Поиск находит посты по тексту, сообществу и автору"""
+        queries = {
+            'борщ': [self.soup],
+            'БАЙКАЛ': [self.travel],
+            'кулинария': [self.soup],
+            'pavel': [self.travel],
+            'рецепт байкал': [],
+        }
+        for query, expected in queries.items():
+            with self.subTest(query=query):
+                self.assertEqual(self.found(query), expected)
+
+    def test_index_follows_edits_and_deletes(self):
+        """Индекс обновляется при правке и удалении поста"""
+        post = Post.objects.get(pk=self.travel.pk)
+        post.text = 'Поездка на Алтай'
+        post.save()
+        self.assertEqual(self.found('байкал'), [])
+        self.assertEqual(self.found('алтай'), [post])
+        post.delete()
+        self.assertEqual(self.found('алтай'), [])
+
+    def test_results_are_ranked_and_paged(self):
+        """Результаты отсортированы по релевантности и листаются курсором"""
+        for i in range(10):
+            Post.objects.create(text=f'Щи номер {i}', author=self.author)
+        best = Post.objects.create(text='Щи, щи и снова щи',
+                                   author=self.author)
+        response = self.guest_client.get(reverse('search'), {'q': 'щи'})
+        page = response.context['page']
+        self.assertEqual(page[0], best)
+        self.assertContains(response, 'q=%D1%89%D0%B8&amp;cursor=')
+        second = self.guest_client.get(
+            reverse('search'), {'q': 'щи', 'cursor': page.next_cursor}
+        ).context['page']
+        self.assertEqual(len(page) + len(second), 11)
+        self.assertFalse(set(page) & set(second))
+
+    def test_empty_query(self):
+        """Пустой запрос ничего не ищет"""
+        self.assertEqual(self.found(''), [])
+
+
+@override_settings(SEARCH_BACKEND='index')
+class InvertedIndexSearchTest(SearchTest):
+    def test_rebuild(self):
+        """Перестроение индекса находит посты, созданные без сигналов"""
+        Post.objects.bulk_create([Post(text='Пельмени',
+                                       author=self.author)])
+        self.assertEqual(self.found('пельмени'), [])
+        search.rebuild()
+        self.assertEqual(len(self.found('пельмени')), 1)
@@ -0,0 +1,80 @@
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+
+from yatube.sqlite3.base import DatabaseWrapper
+
+
+class SqliteBackendTest(SimpleTestCase):
+    # Своя база во временном каталоге. databases нужен pytest-django:
+    # без него он запрещает соединения с любой базой.
+    databases = {'default'}
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def wrapper(self, pragmas):
+        return DatabaseWrapper({
+            'NAME': os.path.join(self.directory, 'db.sqlite3'),
+            'OPTIONS': {'pragmas': pragmas},
+            'ATOMIC_REQUESTS': False, 'AUTOCOMMIT': True,
+            'CONN_MAX_AGE': 0, 'TIME_ZONE': None, 'USER': '',
+            'PASSWORD': '', 'HOST': '', 'PORT': '', 'TEST': {},
+        })
+
+    def test_pragmas_are_applied_on_connect(self):
+        """PRAGMA из OPTIONS выполняются на новом соединении"""
+        wrapper = self.wrapper({'journal_mode': 'WAL', 'cache_size': -4000})
+        try:
+            with wrapper.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                self.assertEqual(cursor.fetchone()[0], 'wal')
+                cursor.execute('PRAGMA cache_size')
+                self.assertEqual(cursor.fetchone()[0], -4000)
+        finally:
+            wrapper.close()
+
+    def test_invalid_pragma(self):
+        """Подозрительная PRAGMA не выполняется"""
+        wrapper = self.wrapper({'journal_mode': 'WAL; DROP TABLE x'})
+        with self.assertRaises(ImproperlyConfigured):
+            wrapper.connect()
+
+
+class ProfilesTest(SimpleTestCase):
+    def load(self, name, **environ):
+        sys.modules.pop(f'yatube.settings.{name}', None)
+        with mock.patch.dict(os.environ, environ):
+            return importlib.import_module(f'yatube.settings.{name}')
+
+    def test_production_profile(self):
+        """Боевой профиль включает постоянные соединения, WAL, кэш
+        шаблонов и сжатие"""
+        prod = self.load('prod', YATUBE_SECRET_KEY='secret')
+        database = prod.DATABASES['default']
+        self.assertFalse(prod.DEBUG)
+        self.assertEqual(prod.SECRET_KEY, 'secret')
+        self.assertGreater(database['CONN_MAX_AGE'], 0)
+        self.assertEqual(database['OPTIONS']['pragmas']['journal_mode'],
+                         'WAL')
+        self.assertIn('loaders', prod.TEMPLATES[0]['OPTIONS'])
+        self.assertIn('django.middleware.gzip.GZipMiddleware',
+                      prod.MIDDLEWARE)
+        self.assertIn('django.middleware.http.ConditionalGetMiddleware',
+                      prod.MIDDLEWARE)
+
+    def test_production_requires_secret_key(self):
+        """Без YATUBE_SECRET_KEY боевой профиль не загружается"""
+        with mock.patch.dict(os.environ):
+            os.environ.pop('YATUBE_SECRET_KEY', None)
+            with self.assertRaises(ImproperlyConfigured):
+                self.load('prod')
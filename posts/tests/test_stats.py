@@ -0,0 +1,69 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Post, User, UserStats
+
+
+class UserStatsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Andrey')
+        cls.reader = User.objects.create(username='Pavel')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(UserStatsTest.reader)
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_follow_and_unfollow_update_counters(self):
+        """Подписка и отписка меняют счётчики обоих пользователей"""
+        self.authorized_client.get(reverse('profile_follow', kwargs={
+            'username': UserStatsTest.author.username}))
+        self.assertEqual(self.stats(UserStatsTest.author).followers, 1)
+        self.assertEqual(self.stats(UserStatsTest.reader).following, 1)
+        self.authorized_client.get(reverse('profile_unfollow', kwargs={
+            'username': UserStatsTest.author.username}))
+        self.assertEqual(self.stats(UserStatsTest.author).followers, 0)
+        self.assertEqual(self.stats(UserStatsTest.reader).following, 0)
+
+    def test_posts_and_comments_counters(self):
+        """Создание и удаление постов и комментариев меняют счётчики"""
+        post = Post.objects.create(text='Текст', author=UserStatsTest.author)
+        comment = Comment.objects.create(post=post, text='Комментарий',
+                                         author=UserStatsTest.reader)
+        self.assertEqual(self.stats(UserStatsTest.author).posts, 1)
+        self.assertEqual(self.stats(UserStatsTest.reader).comments, 1)
+        comment.delete()
+        post.delete()
+        self.assertEqual(self.stats(UserStatsTest.author).posts, 0)
+        self.assertEqual(self.stats(UserStatsTest.reader).comments, 0)
+
+    def test_profile_card_uses_stats(self):
+        """Карточка профиля выводит счётчики из UserStats"""
+        Follow.objects.create(user=UserStatsTest.reader,
+                              author=UserStatsTest.author)
+        response = self.authorized_client.get(reverse('profile', kwargs={
+            'username': UserStatsTest.author.username}))
+        self.assertEqual(response.context['stats'].followers, 1)
+        self.assertTrue(response.context['following'])
+        self.assertContains(response, 'Подписчиков: 1')
+
+    def test_reconcile_fixes_drift(self):
+        """Команда reconcile_stats исправляет рассинхронизацию"""
+        Post.objects.create(text='Текст', author=UserStatsTest.author)
+        UserStats.objects.filter(user=UserStatsTest.author).update(
+            posts=42, followers=7)
+        UserStats.objects.filter(user=UserStatsTest.reader).delete()
+        out = StringIO()
+        call_command('reconcile_stats', stdout=out)
+        self.assertIn('2', out.getvalue())
+        self.assertEqual(self.stats(UserStatsTest.author).posts, 1)
+        self.assertEqual(self.stats(UserStatsTest.author).followers, 0)
+        self.assertTrue(
+            UserStats.objects.filter(user=UserStatsTest.reader).exists())
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.template import engines
+from django.test import SimpleTestCase, override_settings
+
+from yatube.settings.base import template_config
+
+from .. import templating
+
+
+@override_settings(TEMPLATES=template_config(cached=True))
+class TemplateWarmUpTest(SimpleTestCase):
+    def test_warm_up_fills_cached_loader(self):
+        """Прогрев компилирует шаблоны из templates/ в кэш загрузчика"""
+        compiled = templating.warm_up()
+        loader = engines['django'].engine.template_loaders[0]
+        self.assertEqual(compiled, len(list(
+            templating.template_names(settings.TEMPLATES_DIR))))
+        for name in ('index.html', 'includes/post_item.html'):
+            with self.subTest(name=name):
+                self.assertIn(name, loader.get_template_cache)
@@ -0,0 +1,102 @@
+from django.conf import settings
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import threads
+from ..models import Comment, Post, User
+
+
+class CommentThreadsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Andrey')
+        cls.reader = User.objects.create(username='Pavel')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(CommentThreadsTest.reader)
+
+    def comment(self, text, parent=None):
+        return Comment.objects.create(post=CommentThreadsTest.post,
+                                      author=CommentThreadsTest.reader,
+                                      text=text, parent=parent)
+
+    def reply(self, parent, text):
+        self.authorized_client.post(
+            reverse('add_comment', kwargs={
+                'username': CommentThreadsTest.author.username,
+                'post_id': CommentThreadsTest.post.id}),
+            {'text': text, 'parent': parent.id})
+        return Comment.objects.get(text=text)
+
+    def test_replies_follow_their_parent(self):
+        """Ответы идут сразу за родителем, в порядке обхода дерева"""
+        first = self.comment('Первый')
+        second = self.comment('Второй')
+        answer = self.comment('Ответ', first)
+        self.comment('Ответ на ответ', answer)
+        self.comment('Ещё ответ', first)
+        comments = CommentThreadsTest.post.comments.all()
+        self.assertEqual(
+            [(c.text, c.depth) for c in comments],
+            [('Первый', 0), ('Ответ', 1), ('Ответ на ответ', 2),
+             ('Ещё ответ', 1), ('Второй', 0)])
+        self.assertEqual(
+            [c.text for c in threads.subtree(answer)],
+            ['Ответ', 'Ответ на ответ'])
+        self.assertEqual(second.replies.count(), 0)
+
+    def test_reply_counters(self):
+        """reply_count считает все ответы в ветке и уменьшается при
+        удалении"""
+        root = self.comment('Корень')
+        answer = self.comment('Ответ', root)
+        self.comment('Ответ на ответ', answer)
+        root.refresh_from_db()
+        self.assertEqual(root.reply_count, 2)
+        answer.delete()
+        root.refresh_from_db()
+        self.assertEqual(root.reply_count, 0)
+
+    def test_subtree_is_one_query(self):
+        """Ветка с авторами выбирается одним запросом"""
+        root = self.comment('Корень')
+        parent = root
+        for i in range(5):
+            parent = self.comment(f'Ответ {i}', parent)
+        with self.assertNumQueries(1):
+            names = [c.author.username for c in threads.subtree(root)]
+        self.assertEqual(len(names), 6)
+
+    def test_depth_limit(self):
+        """Ответ глубже COMMENT_MAX_DEPTH прикрепляется к предку на
+        последнем допустимом уровне"""
+        parent = self.comment('Корень')
+        chain = [parent]
+        for i in range(settings.COMMENT_MAX_DEPTH):
+            parent = self.reply(parent, f'Уровень {i + 1}')
+            chain.append(parent)
+        self.assertEqual(parent.depth, settings.COMMENT_MAX_DEPTH)
+        deep = self.reply(parent, 'Слишком глубоко')
+        self.assertEqual(deep.depth, settings.COMMENT_MAX_DEPTH)
+        self.assertEqual(deep.parent, chain[-2])
+
+    def test_reply_to_other_post_is_ignored(self):
+        """Ответ на комментарий чужого поста становится корневым"""
+        other = Post.objects.create(text='Другой', author=self.reader)
+        foreign = Comment.objects.create(post=other, author=self.reader,
+                                         text='Чужой')
+        comment = self.reply(foreign, 'Ответ')
+        self.assertIsNone(comment.parent)
+        self.assertEqual(comment.depth, 0)
+
+    def test_bulk_created_roots_get_paths(self):
+        """number_roots нумерует корни, вставленные bulk_create"""
+        Comment.objects.bulk_create([
+            Comment(post=CommentThreadsTest.post,
+                    author=CommentThreadsTest.reader, text=f'№{i}')
+            for i in range(3)])
+        self.assertEqual(threads.number_roots(), 3)
+        self.assertFalse(Comment.objects.filter(path='').exists())
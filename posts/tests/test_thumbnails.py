@@ -0,0 +1,79 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from .. import thumbnails
+from ..models import Post, User
+
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def image_file(name='photo.png', size=(120, 80)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(),
+                              content_type='image/png')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ThumbnailsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='Andrey')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_generate_stores_presets(self):
+        """Миниатюры всех пресетов сохраняются в записи поста"""
+        post = Post.objects.create(text='Текст', author=ThumbnailsTest.user,
+                                   image=image_file())
+        self.assertTrue(thumbnails.generate(post.id))
+        presets = Post.objects.get(pk=post.pk).thumbnail_presets
+        self.assertEqual(set(presets), set(settings.THUMBNAIL_PRESETS))
+        self.assertEqual((presets['feed']['width'],
+                          presets['feed']['height']), (960, 339))
+
+    def test_feed_uses_stored_thumbnail(self):
+        """Лента выводит готовую миниатюру с размерами"""
+        post = Post.objects.create(text='Текст', author=ThumbnailsTest.user,
+                                   image=image_file())
+        thumbnails.generate(post.id)
+        feed = Post.objects.get(pk=post.pk).thumbnail_presets['feed']
+        response = Client().get(reverse('index'))
+        self.assertContains(
+            response, f'src="{feed["url"]}" width="960" height="339"')
+
+    def test_stale_image_is_not_overwritten(self):
+        """Миниатюры заменённой картинки не записываются"""
+        post = Post.objects.create(text='Текст', author=ThumbnailsTest.user,
+                                   image=image_file())
+
+        def replace_image(image):
+            Post.objects.filter(pk=post.pk).update(image='posts/other.png')
+            return {}
+
+        with mock.patch.object(thumbnails, 'render', replace_image):
+            self.assertFalse(thumbnails.generate(post.id))
+        self.assertEqual(Post.objects.get(pk=post.pk).thumbnails, '')
+
+    def test_backfill_command(self):
+        """Команда generate_thumbnails создаёт недостающие миниатюры"""
+        for _ in range(3):
+            Post.objects.create(text='Текст', author=ThumbnailsTest.user,
+                                image=image_file())
+        Post.objects.create(text='Без картинки', author=ThumbnailsTest.user)
+        call_command('generate_thumbnails', workers=1, stdout=io.StringIO())
+        self.assertFalse(
+            Post.objects.exclude(image='').filter(thumbnails='').exists())
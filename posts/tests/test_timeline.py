@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Follow, Post, TimelineEntry, User
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create(username='Reader')
+        cls.author = User.objects.create(username='Writer')
+        cls.stranger = User.objects.create(username='Stranger')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(TimelineTest.reader)
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        """Новый пост попадает в ленты подписчиков автора"""
+        Follow.objects.create(user=TimelineTest.reader,
+                              author=TimelineTest.author)
+        post = Post.objects.create(text='Для подписчиков',
+                                   author=TimelineTest.author)
+        Post.objects.create(text='Чужой пост', author=TimelineTest.stranger)
+        self.assertEqual(
+            list(TimelineEntry.objects.values_list('user', 'post')),
+            [(TimelineTest.reader.id, post.id)]
+        )
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Подписка заполняет ленту старыми постами, отписка очищает"""
+        Post.objects.create(text='Старый пост', author=TimelineTest.author)
+        self.authorized_client.get(reverse('profile_follow', kwargs={
+            'username': TimelineTest.author.username}))
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=TimelineTest.reader).count(), 1)
+        self.authorized_client.get(reverse('profile_unfollow', kwargs={
+            'username': TimelineTest.author.username}))
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=TimelineTest.reader).exists())
+
+    @override_settings(TIMELINE_FANOUT_MAX_FOLLOWERS=0)
+    def test_heavy_author_is_pulled_on_read(self):
+        """Посты авторов с большим числом подписчиков подтягиваются
+        в ленту при чтении"""
+        Follow.objects.create(user=TimelineTest.reader,
+                              author=TimelineTest.author)
+        post = Post.objects.create(text='Пост звезды',
+                                   author=TimelineTest.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        for _ in range(2):
+            response = self.authorized_client.get(reverse('follow_index'))
+            self.assertEqual(list(response.context['page']), [post])
+        # Чтение ленты ничего не пишет и не привязывает к основной базе.
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+
+    def test_heavy_author_cursor_survives_threshold_change(self):
+        """Курсор ленты работает и после того, как автор стал
+        «тяжёлым»"""
+        Follow.objects.create(user=TimelineTest.reader,
+                              author=TimelineTest.author)
+        for i in range(13):
+            Post.objects.create(text=f'Пост {i}', author=TimelineTest.author)
+        first = self.authorized_client.get(
+            reverse('follow_index')).context['page']
+        with self.settings(TIMELINE_FANOUT_MAX_FOLLOWERS=0):
+            second = self.authorized_client.get(
+                reverse('follow_index') + '?cursor=' + first.next_cursor
+            ).context['page']
+        self.assertEqual([post.text for post in second],
+                         ['Пост 2', 'Пост 1', 'Пост 0'])
+
+    def test_follow_feed_pages(self):
+        """Лента подписок листается курсором"""
+        Follow.objects.create(user=TimelineTest.reader,
+                              author=TimelineTest.author)
+        for i in range(13):
+            Post.objects.create(text=f'Пост {i}', author=TimelineTest.author)
+        first = self.authorized_client.get(
+            reverse('follow_index')).context['page']
+        second = self.authorized_client.get(
+            reverse('follow_index') + '?cursor=' + first.next_cursor
+        ).context['page']
+        self.assertEqual(len(first), 10)
+        self.assertEqual(len(second), 3)
+        self.assertEqual(first[0].text, 'Пост 12')
+        self.assertEqual(second[2].text, 'Пост 0')
@@ -1,6 +1,9 @@
+from django.core.checks import run_checks
 from django.test import Client, TestCase
 from django.urls.base import reverse
 
+from users.forms import CreationForm
+
 from ..models import Group, Post, User
 
 
@@ -143,3 +146,28 @@ class PostsURLTests(TestCase):
         response = self.guest_client.get(original_url, follow=True)
         self.assertRedirects(response,  reverse('login') + '?next=' +
                              original_url)
+
+
+class ReservedUsernameTests(TestCase):
+    def test_signup_rejects_route_names(self):
+        """Нельзя зарегистрироваться под именем адреса сайта"""
+        for username in ('search', 'notifications', 'metrics', 'health',
+                         'posts', 'groups'):
+            with self.subTest(username=username):
+                form = CreationForm({'username': username,
+                                     'password1': 'Secret-pass-42',
+                                     'password2': 'Secret-pass-42'})
+                self.assertIn('username', form.errors)
+        self.assertTrue(CreationForm({'username': 'searcher',
+                                      'password1': 'Secret-pass-42',
+                                      'password2': 'Secret-pass-42'}
+                                     ).is_valid())
+
+    def test_check_finds_shadowed_profiles(self):
+        """check --database находит пользователей с занятыми именами"""
+        User.objects.create(username='export')
+        User.objects.create(username='Andrey')
+        warnings = [message for message in run_checks(tags=['database'])
+                    if message.id == 'users.W001']
+        self.assertEqual(len(warnings), 1)
+        self.assertIn('export', warnings[0].msg)
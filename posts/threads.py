@@ -0,0 +1,73 @@
+"""Ветки комментариев с материализованным путём.
+
+Путь комментария — id всех предков и его собственный, каждый дополнен
+нулями до PATH_WIDTH символов. Сортировка по пути даёт обход дерева в
+глубину с ответами по порядку, поэтому весь пост или поддерево ветки
+выбирается одним запросом по индексу (post, path) и выводится плоским
+списком с отступом depth, без рекурсии и запросов на каждый узел.
+
+reply_count — число всех ответов под комментарием; у корня это размер
+ветки.
+"""
+from django.conf import settings
+from django.db.models import CharField, F, Value
+from django.db.models.functions import Cast, LPad
+
+from .models import PATH_WIDTH, Comment
+
+
+def segment(comment_id):
+    return str(comment_id).zfill(PATH_WIDTH)
+
+
+def ancestor_ids(path):
+    return [int(path[i:i + PATH_WIDTH])
+            for i in range(0, len(path) - PATH_WIDTH, PATH_WIDTH)]
+
+
+def parent_for(post, parent_id):
+    """Комментарий, к которому прикрепится ответ. Ответ глубже
+    COMMENT_MAX_DEPTH уходит к предку на последнем допустимом уровне."""
+    try:
+        parent = Comment.objects.get(post=post, pk=int(parent_id))
+    except (TypeError, ValueError, Comment.DoesNotExist):
+        return None
+    if parent.depth < settings.COMMENT_MAX_DEPTH:
+        return parent
+    chain = ancestor_ids(parent.path) + [parent.id]
+    return Comment.objects.get(pk=chain[settings.COMMENT_MAX_DEPTH - 1])
+
+
+def place(comment):
+    """Пишет путь только что созданного комментария и увеличивает
+    reply_count его предков."""
+    prefix = comment.parent.path if comment.parent_id else ''
+    comment.path = prefix + segment(comment.id)
+    Comment.objects.filter(pk=comment.pk).update(path=comment.path)
+    ancestors = ancestor_ids(comment.path)
+    if ancestors:
+        Comment.objects.filter(pk__in=ancestors).update(
+            reply_count=F('reply_count') + 1)
+
+
+def unplace(comment):
+    ancestors = ancestor_ids(comment.path)
+    if ancestors:
+        Comment.objects.filter(pk__in=ancestors).update(
+            reply_count=F('reply_count') - 1)
+
+
+def number_roots(comments=None):
+    """Пути для корневых комментариев, вставленных bulk_create: сигналы
+    там не срабатывают. Один UPDATE на всю выборку."""
+    if comments is None:
+        comments = Comment.objects.all()
+    return comments.filter(path='', parent=None).update(
+        path=LPad(Cast('id', CharField()), PATH_WIDTH, Value('0')))
+
+
+def subtree(comment):
+    """Комментарий и все ответы под ним в порядке обхода."""
+    return Comment.objects.filter(
+        post_id=comment.post_id, path__startswith=comment.path
+    ).select_related('author')
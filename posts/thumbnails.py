@@ -0,0 +1,39 @@
+import json
+
+from django.conf import settings
+from sorl.thumbnail import get_thumbnail
+
+from . import queue
+from .models import Post
+
+
+def render(image):
+    result = {}
+    for name, preset in settings.THUMBNAIL_PRESETS.items():
+        options = dict(preset)
+        thumbnail = get_thumbnail(image, options.pop('geometry'), **options)
+        result[name] = {
+            'url': thumbnail.url,
+            'width': thumbnail.width,
+            'height': thumbnail.height,
+        }
+    return result
+
+
+def generate(post_id):
+    post = Post.objects.filter(pk=post_id).only('id', 'image').first()
+    if post is None or not post.image:
+        return False
+    thumbnails = json.dumps(render(post.image))
+    # Если картинку успели заменить, миниатюры устарели — не сохраняем.
+    return bool(Post.objects.filter(pk=post_id, image=post.image.name).update(
+        thumbnails=thumbnails))
+
+
+def schedule(post):
+    """Сбрасывает старые миниатюры поста и ставит генерацию новых в
+    очередь задач."""
+    if post.thumbnails:
+        Post.objects.filter(pk=post.pk).update(thumbnails='')
+    if post.image:
+        queue.enqueue('thumbnails.generate', post.pk)
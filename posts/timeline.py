@@ -0,0 +1,119 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Q
+
+from .models import Follow, Post, TimelineEntry, UserStats
+
+BATCH_SIZE = 1000
+FEED_ORDERING = ('-timeline_entries__pub_date', '-timeline_entries__post_id')
+
+
+def is_heavy(author_id):
+    """Авторы с огромным числом подписчиков не раздаются при записи,
+    их посты подтягиваются в ленту при чтении."""
+    return UserStats.objects.filter(
+        user_id=author_id,
+        followers__gt=settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+    ).exists()
+
+
+def _entries(user_ids, post):
+    return [
+        TimelineEntry(user_id=user_id, post_id=post.id,
+                      author_id=post.author_id, pub_date=post.pub_date)
+        for user_id in user_ids
+    ]
+
+
+def fan_out(post):
+    if is_heavy(post.author_id):
+        return
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    batch = []
+    for user_id in follower_ids.iterator(chunk_size=BATCH_SIZE):
+        batch.append(user_id)
+        if len(batch) == BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(_entries(batch, post),
+                                              ignore_conflicts=True)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(_entries(batch, post),
+                                          ignore_conflicts=True)
+
+
+def fan_out_batch(posts):
+    """fan_out() для пачки постов: подписчики всех авторов читаются одним
+    запросом. Нужна массовой загрузке, где сигналы не срабатывают."""
+    by_author = defaultdict(list)
+    for post in posts:
+        by_author[post.author_id].append(post)
+    heavy = UserStats.objects.filter(
+        user_id__in=by_author,
+        followers__gt=settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+    ).values_list('user_id', flat=True)
+    follows = Follow.objects.filter(
+        author_id__in=set(by_author) - set(heavy)
+    ).values_list('author_id', 'user_id')
+    batch = []
+    for author_id, user_id in follows.iterator(chunk_size=BATCH_SIZE):
+        for post in by_author[author_id]:
+            batch.extend(_entries([user_id], post))
+        if len(batch) >= BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def backfill(user_id, author_id):
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id').values_list('id', 'pub_date')
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post_id=post_id,
+                          author_id=author_id, pub_date=pub_date)
+            for post_id, pub_date in posts[:settings.TIMELINE_BACKFILL_LIMIT]
+        ],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def prune(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def heavy_authors(user_id):
+    return list(Follow.objects.filter(
+        user_id=user_id,
+        author__stats__followers__gt=settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+    ).values_list('author_id', flat=True))
+
+
+def feed_scopes(user_id):
+    """Области кэша ленты подписок: сама подписка и авторы, на которых
+    подписан пользователь. Посты остальных авторов её не сбрасывают."""
+    authors = Follow.objects.filter(user_id=user_id).values_list(
+        'author_id', flat=True)
+    return ('groups', f'follow:{user_id}',
+            *(f'author:{author_id}' for author_id in authors))
+
+
+def feed(user):
+    """Посты ленты подписок и порядок, в котором их листать.
+
+    Обычно это один диапазон по индексу ленты. Посты авторов, которые
+    не раздаются при записи, добавляются при чтении условием по автору:
+    чтение ленты ничего не пишет в базу. Ключи обоих порядков совпадают
+    (дата и id поста), поэтому курсор переживает смену варианта.
+    """
+    heavy = heavy_authors(user.id)
+    if not heavy:
+        return (Post.objects.filter(timeline_entries__user=user),
+                FEED_ORDERING)
+    entries = TimelineEntry.objects.filter(user=user).values('post_id')
+    return (Post.objects.filter(Q(id__in=entries) | Q(author_id__in=heavy)),
+            ('-pub_date', '-id'))
@@ -1,17 +1,24 @@
 from django.urls import path
 
-from . import views
+from . import health, metrics, views
 
 urlpatterns = [
     path('', views.index, name='index'),
     path('group/<slug:slug>/', views.group_posts, name='group'),
     path('new/', views.new_post, name='new_post'),
+    path('search/', views.search_posts, name='search'),
+    path('export/', views.export_data, name='export'),
     path('500/', views.server_error, name='500'),
     path('404/', views.page_not_found, name='404'),
+    path('health/cache/', health.cache_health, name='cache_health'),
+    path('metrics', metrics.metrics_view, name='metrics'),
 
     path('follow/', views.follow_index, name='follow_index'),
+    path('notifications/', views.notification_list, name='notifications'),
     path('<str:username>/', views.profile, name='profile'),
     path('<str:username>/<int:post_id>/', views.post_view, name='post'),
+    path('<str:username>/<int:post_id>/comments/', views.post_comments,
+         name='post_comments'),
     path('<str:username>/<int:post_id>/edit/', views.post_edit,
          name='post_edit'),
     path('<username>/<int:post_id>/comment', views.add_comment,
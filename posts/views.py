@@ -1,31 +1,125 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import urlencode
+from django.views.decorators.http import require_safe
 
+from . import (caching, exporter, notifications, search, stats, threads,
+               thumbnails, timeline)
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from .models import Comment, Follow, Group, Post, User
+from .paginator import NEXT, CursorPaginator, encode_cursor
+from .routers import replica_reads
 
+POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 20
 
+
+def paginate(request, queryset, ordering=('-pub_date', '-id'),
+             fragment=None):
+    """Страница ленты. Если разметка ленты уже есть в кэше fragment,
+    запрос страницы не выполняется."""
+    paginator = CursorPaginator(queryset, POSTS_PER_PAGE, ordering)
+    cursor = request.GET.get('cursor')
+    if fragment is not None and fragment.get() is not None:
+        page = paginator.lazy_page(cursor, *fragment.cursors)
+    else:
+        page = paginator.get_page(cursor)
+        if fragment is not None:
+            fragment.cursors = (page.next_cursor, page.previous_cursor)
+    return page.paginator, page
+
+
+def feed_fragment(request, feed, scopes):
+    return caching.FeedFragment(feed, scopes, request,
+                                request.GET.get('cursor', ''))
+
+
+def comments_url(post, cursor, thread=''):
+    if not cursor:
+        return ''
+    query = {'cursor': cursor, 'thread': thread} if thread else {
+        'cursor': cursor}
+    return reverse('post_comments', kwargs={
+        'username': post.author.username, 'post_id': post.id
+    }) + '?' + urlencode(query)
+
+
+def is_following(request, author):
+    return (request.user.is_authenticated and
+            Follow.objects.filter(user=request.user, author=author).exists())
+
+
+def viewer(request):
+    return request.user.pk if request.user.is_authenticated else 'anon'
+
+
+def conditional_page(request, last_modified, scopes, parts, render_page):
+    """Страница с валидаторами: если у клиента актуальная версия,
+    отвечаем 304 без рендера шаблона. Анонимные страницы разрешено
+    хранить общим кэшам, страницы пользователей — только браузеру."""
+    etag = caching.validator(
+        last_modified, scopes, request.get_full_path(), viewer(request),
+        *parts)
+    response = caching.conditional(request, etag, render_page)
+    patch_vary_headers(response, ('Cookie',))
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(response, public=True,
+                            max_age=settings.HTML_CACHE_MAX_AGE)
+    return response
+
+
+@replica_reads
 def index(request):
-    post_list = Post.objects.select_related('group')
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, 'index.html', {
-        'page': page,
-        'paginator': paginator
-    })
+    post_list = Post.objects.for_feed()
 
+    def render_page():
+        feed = feed_fragment(request, 'index', ('global',))
+        paginator, page = paginate(request, post_list, fragment=feed)
+        return render(request, 'index.html', {
+            'page': page,
+            'paginator': paginator,
+            'feed': feed,
+        })
 
+    return conditional_page(
+        request, caching.newest(Post.objects.all(), 'pub_date'),
+        ('global',), (), render_page)
+
+
+@replica_reads
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()[:10]
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, 'group.html', {
-        'group': group,
+    scopes = (f'group:{group.id}',)
+
+    def render_page():
+        feed = feed_fragment(request, 'group', scopes)
+        paginator, page = paginate(request, group.posts.for_feed(),
+                                   fragment=feed)
+        return render(request, 'group.html', {
+            'group': group,
+            'page': page,
+            'paginator': paginator,
+            'feed': feed,
+        })
+
+    return conditional_page(
+        request, caching.newest(group.posts.all(), 'pub_date'), scopes, (),
+        render_page)
+
+
+def search_posts(request):
+    query = request.GET.get('q', '').strip()
+    posts, ordering = search.search(query)
+    paginator, page = paginate(request, posts, ordering)
+    return render(request, 'search.html', {
+        'query': query,
         'page': page,
         'paginator': paginator
     })
@@ -34,54 +128,123 @@ def group_posts(request, slug):
 @login_required
 def new_post(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
+    # Транзакция открывается с BEGIN IMMEDIATE и держит блокировку записи,
+    # поэтому картинку обрабатываем в is_valid() до неё.
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
-        form.save()
+        with transaction.atomic():
+            form.save()
+            thumbnails.schedule(post)
         return redirect('index')
     return render(request, 'posts/new.html', {'form': form})
 
 
+@replica_reads
 def profile(request, username):
-    user = get_object_or_404(User, username=username)
-    user_posts = Post.objects.filter(author__username=username)
-    followers_count = Follow.objects.filter(author__username=user).count()
-    following_count = Follow.objects.filter(user__username=user).count()
-    following = Follow.objects.filter(user__username=request.user.username,
-                                      author__username=user).exists()
-    paginator = Paginator(user_posts, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, 'profile.html', {
-        'author': user,
-        'user_posts': user_posts,
-        'page': page,
-        'paginator': paginator,
-        'followers_count': followers_count,
-        'following_count': following_count,
-        'following': following
-    })
+    user = get_object_or_404(User.objects.select_related('stats'),
+                             username=username)
+    user_stats = stats.get_for(user)
+    following = is_following(request, user)
+    scopes = (f'author:{user.id}',)
+
+    def render_page():
+        user_posts = user.posts.for_feed()
+        feed = feed_fragment(request, 'profile', scopes)
+        paginator, page = paginate(request, user_posts, fragment=feed)
+        return render(request, 'profile.html', {
+            'author': user,
+            'user_posts': user_posts,
+            'page': page,
+            'paginator': paginator,
+            'stats': user_stats,
+            'following': following,
+            'feed': feed,
+        })
+
+    return conditional_page(
+        request, caching.newest(user.posts.all(), 'pub_date'), scopes,
+        (user_stats.followers, user_stats.following, user_stats.posts,
+         following), render_page)
 
 
 def post_view(request, username, post_id):
-    user = get_object_or_404(User, username=username)
-    post = get_object_or_404(Post, id=post_id, author=user)
-    post_count = Post.objects.filter(author__username=username).count()
-    comments = post.comments.all()
-    form = CommentForm(request.POST or None)
-    followers_count = Follow.objects.filter(author__username=user).count()
-    following_count = Follow.objects.filter(user__username=user).count()
-    following = Follow.objects.filter(user__username=request.user.username,
-                                      author__username=user).exists()
-    return render(request, 'post.html', {
-        'author': user,
+    user = get_object_or_404(User.objects.select_related('stats'),
+                             username=username)
+    post = get_object_or_404(Post.objects.for_feed(), id=post_id,
+                             author=user)
+    user_stats = stats.get_for(user)
+    following = is_following(request, user)
+
+    def render_page():
+        # Первые комментарии встраиваются в страницу, остальные
+        # подгружаются через post_comments.
+        comments = post.comments.select_related('author')[
+            :COMMENTS_PER_PAGE]
+        cursor = ''
+        if post.comment_count > COMMENTS_PER_PAGE:
+            last = list(comments)[-1]
+            cursor = encode_cursor(NEXT, [
+                getattr(last, field) for field in Comment._meta.ordering])
+        return render(request, 'post.html', {
+            'author': user,
+            'post': post,
+            'comments': comments,
+            'comments_next': comments_url(post, cursor),
+            'form': CommentForm(request.POST or None),
+            'stats': user_stats,
+            'following': following
+        })
+
+    if request.method != 'GET':
+        return render_page()
+    last_modified = max(filter(None, (
+        post.pub_date, caching.newest(post.comments.all(), 'created'))))
+    # В форме комментария есть CSRF-токен, он привязан к cookie.
+    csrf = request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+    return conditional_page(
+        request, last_modified, (f'author:{user.id}',),
+        (user_stats.followers, user_stats.following, user_stats.posts,
+         following, csrf), render_page)
+
+
+@replica_reads
+@require_safe
+def post_comments(request, username, post_id):
+    """Следующая страница комментариев: HTML-фрагмент для кнопки
+    «Показать ещё» или JSON при format=json. С thread=<id> отдаёт
+    только ветку под этим комментарием."""
+    post = get_object_or_404(Post.objects.select_related('author'),
+                             id=post_id, author__username=username)
+    comments = post.comments.select_related('author')
+    thread = request.GET.get('thread', '')
+    if thread:
+        if not thread.isdigit():
+            raise Http404
+        comments = threads.subtree(
+            get_object_or_404(Comment, post=post, pk=thread))
+    page = CursorPaginator(comments, COMMENTS_PER_PAGE,
+                           Comment._meta.ordering
+                           ).get_page(request.GET.get('cursor'))
+    next_url = comments_url(post, page.next_cursor, thread)
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'results': [{
+                'id': comment.id,
+                'parent': comment.parent_id,
+                'depth': comment.depth,
+                'replies': comment.reply_count,
+                'author': comment.author.username,
+                'text': comment.text,
+                'created': comment.created.isoformat(),
+            } for comment in page],
+            'next': next_url and request.build_absolute_uri(next_url),
+        })
+    return render(request, 'includes/comment_list.html', {
+        'author': post.author,
         'post': post,
-        'post_count': post_count,
-        'comments': comments,
-        'form': form,
-        'followers_count': followers_count,
-        'following_count': following_count,
-        'following': following
+        'comments': page,
+        'comments_next': next_url,
     })
 
 
@@ -100,6 +263,8 @@ def post_edit(request, username, post_id):
         post = form.save(commit=False)
         post.author = request.user
         form.save()
+        if 'image' in form.changed_data:
+            thumbnails.schedule(post)
         return redirect(reverse('post', kwargs={
             'username': username,
             'post_id': post_id
@@ -111,6 +276,16 @@ def post_edit(request, username, post_id):
     })
 
 
+@login_required
+def export_data(request):
+    file_format = request.GET.get('format', 'jsonl')
+    if file_format not in exporter.WRITERS:
+        file_format = 'jsonl'
+    return exporter.streaming_response(
+        exporter.rows(*exporter.user_querysets(request.user)), file_format,
+        f'yatube-{request.user.username}')
+
+
 def page_not_found(request, exception=None):
     return render(
         request,
@@ -133,7 +308,10 @@ def add_comment(request, username, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        form.save()
+        with transaction.atomic():
+            comment.parent = threads.parent_for(
+                post, request.POST.get('parent'))
+            form.save()
         return redirect('post', username, post_id)
     return redirect('post', username, post_id)
 
@@ -142,24 +320,45 @@ def add_comment(request, username, post_id):
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if request.user != author:
-        Follow.objects.get_or_create(user=request.user, author=author)
+        with transaction.atomic():
+            Follow.objects.get_or_create(user=request.user, author=author)
     return redirect('profile', username=username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    Follow.objects.filter(user=request.user,
-                          author__username=username).delete()
+    with transaction.atomic():
+        Follow.objects.filter(user=request.user,
+                              author__username=username).delete()
     return redirect('profile', username=username)
 
 
 @login_required
+def notification_list(request):
+    ordering = ('-created', '-id')
+    paginator, page = paginate(
+        request,
+        request.user.notifications.select_related(
+            'post__author', 'post__group').order_by(*ordering),
+        ordering)
+    response = render(request, 'notifications.html', {
+        'page': page,
+        'paginator': paginator,
+    })
+    notifications.mark_read(request.user, page)
+    return response
+
+
+@login_required
+@replica_reads
 def follow_index(request):
-    following_posts = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(following_posts, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    feed = feed_fragment(request, 'follow',
+                         timeline.feed_scopes(request.user.id))
+    following_posts, ordering = timeline.feed(request.user)
+    paginator, page = paginate(request, following_posts.for_feed(),
+                               ordering, fragment=feed)
     return render(request, "follow.html", {
         'page': page,
-        'paginator': paginator
+        'paginator': paginator,
+        'feed': feed,
     })
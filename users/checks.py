@@ -0,0 +1,59 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.checks import Tags, Warning, register
+from django.urls import URLResolver, get_resolver
+
+USERNAME_SEGMENT = re.compile(r'<(\w+:)?username>')
+
+
+def _segment(pattern):
+    return str(pattern.pattern).lstrip('^').split('/', 1)[0]
+
+
+def _levels(patterns):
+    """Маршруты, разобранные по уровням вложенности. include() без
+    префикса добавляет маршруты в тот уровень, куда он включён."""
+    level = []
+    for pattern in patterns:
+        if not isinstance(pattern, URLResolver):
+            level.append(pattern)
+            continue
+        nested = list(_levels(pattern.url_patterns))
+        if _segment(pattern):
+            level.append(pattern)
+            yield from nested
+        else:
+            level.extend(nested[-1])
+            yield from nested[:-1]
+    yield level
+
+
+def _prefixes(patterns):
+    for level in _levels(patterns):
+        segments = [_segment(pattern) for pattern in level]
+        if any(USERNAME_SEGMENT.fullmatch(segment) for segment in segments):
+            yield from (segment for segment in segments
+                        if segment and '<' not in segment)
+
+
+def reserved_usernames():
+    """Сегменты адресов, стоящие рядом с <username> (/<username>/,
+    /api/v1/<username>/): пользователь с таким именем не откроет свой
+    профиль."""
+    return frozenset(_prefixes(get_resolver().url_patterns))
+
+
+@register(Tags.database)
+def check_reserved_usernames(app_configs=None, **kwargs):
+    """manage.py check --database находит пользователей, чьи профили
+    перекрыты адресами сайта."""
+    taken = get_user_model().objects.filter(
+        username__in=reserved_usernames()
+    ).values_list('username', flat=True)
+    return [
+        Warning(f'Профиль пользователя {username} перекрыт адресом сайта',
+                hint='Переименуйте пользователя.',
+                id='users.W001')
+        for username in taken
+    ]
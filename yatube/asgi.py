@@ -0,0 +1,16 @@
+'''
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Django 2.2 has no ASGI support of its own, see yatube.handlers.
+
+Run with any ASGI server, for example ``uvicorn yatube.asgi:application``.
+'''
+
+import os
+
+from yatube.handlers import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+application = get_asgi_application()
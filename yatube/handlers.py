@@ -0,0 +1,210 @@
+"""ASGI-адаптер для Django 2.2, в котором ASGI ещё нет.
+
+Тело запроса читается, а ответ отправляется в цикле событий, поэтому
+медленный клиент или долгая загрузка картинки не держат поток. Поток из
+пула ASGI_THREADS занят только пока Django обрабатывает уже полученный
+запрос; потоковый ответ он же читает до конца и закрывает. Сами
+представления и ORM остаются синхронными и работают через обычный
+WSGIHandler со всеми middleware и сигналами.
+"""
+import asyncio
+import io
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+
+import django
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+
+# Сколько кусков потокового ответа может ждать отправки клиенту.
+STREAM_BUFFER = 8
+
+# Заголовки, которые в WSGI передаются без префикса HTTP_.
+UNPREFIXED = {'content-type': 'CONTENT_TYPE',
+              'content-length': 'CONTENT_LENGTH'}
+
+
+class Disconnected(Exception):
+    pass
+
+
+class Stream:
+    """Куски ответа из потока Django в цикл событий. Поток ждёт, пока в
+    очереди не освободится место, так что медленный клиент не заставляет
+    держать весь ответ в памяти."""
+
+    def __init__(self, loop, size=None):
+        self.loop = loop
+        self.queue = asyncio.Queue()
+        self.slots = threading.Semaphore(size) if size else None
+        self.cancelled = False
+
+    def put(self, message):
+        if self.slots is not None:
+            self.slots.acquire()
+        if self.cancelled:
+            raise Disconnected
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, message)
+
+    async def get(self):
+        message = await self.queue.get()
+        if self.slots is not None and message is not None:
+            self.slots.release()
+        return message
+
+    def cancel(self):
+        self.cancelled = True
+        if self.slots is not None:
+            self.slots.release()
+
+
+class ASGIHandler:
+    def __init__(self, workers=None):
+        self.wsgi = WSGIHandler()
+        if workers is None:
+            workers = settings.ASGI_THREADS
+        # 0 — обработка прямо в цикле событий, как в тестах.
+        self.executor = (ThreadPoolExecutor(workers,
+                                            thread_name_prefix='asgi')
+                         if workers else None)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f'Unsupported ASGI scope: {scope["type"]}')
+        try:
+            body = await self.read_body(receive)
+        except Disconnected:
+            return
+        loop = asyncio.get_running_loop()
+        stream = Stream(loop, STREAM_BUFFER if self.executor else None)
+        done = self.call(self.run, self.environ(scope, body), stream)
+        try:
+            while True:
+                message = await stream.get()
+                if message is None:
+                    break
+                await send(message)
+        except BaseException:
+            stream.cancel()
+            raise
+        finally:
+            await done
+
+    def call(self, function, *args):
+        """Future выполнения function в пуле. Без пула function
+        выполняется сразу."""
+        loop = asyncio.get_running_loop()
+        if self.executor is not None:
+            return loop.run_in_executor(self.executor, function, *args)
+        future = loop.create_future()
+        future.set_result(function(*args))
+        return future
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.executor is not None:
+                    self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive):
+        # Большие тела уходят на диск, как загрузки в самом Django.
+        body = SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE,
+            dir=settings.FILE_UPLOAD_TEMP_DIR)
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                raise Disconnected
+            body.write(message.get('body', b''))
+            if not message.get('more_body', False):
+                body.seek(0)
+                return body
+
+    def run(self, environ, stream):
+        """Выполняется в одном потоке пула от запроса до закрытия ответа.
+        Потоковый ответ тоже читается здесь целиком: курсоры выгрузки
+        открыты на соединении этого потока, и request_finished закрывает
+        соединения того потока, который их открыл."""
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = [
+                (name.lower().encode('latin1'), value.encode('latin1'))
+                for name, value in headers]
+
+        response = None
+        try:
+            response = self.wsgi(environ, start_response)
+            stream.put({'type': 'http.response.start',
+                        'status': started['status'],
+                        'headers': started['headers']})
+            if not getattr(response, 'streaming', False):
+                stream.put({'type': 'http.response.body',
+                            'body': b''.join(response)})
+                return
+            for chunk in response:
+                stream.put({'type': 'http.response.body', 'body': chunk,
+                            'more_body': True})
+            stream.put({'type': 'http.response.body'})
+        except Disconnected:
+            pass
+        finally:
+            if response is not None:
+                response.close()
+            environ['wsgi.input'].close()
+            stream.loop.call_soon_threadsafe(stream.queue.put_nowait, None)
+
+    def environ(self, scope, body):
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', ''),
+            # WSGI хранит путь как байты UTF-8, прочитанные в latin-1.
+            'PATH_INFO': scope['path'].encode().decode('latin1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+            'REMOTE_ADDR': client[0],
+            'REMOTE_PORT': str(client[1]),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope.get('headers', ()):
+            name = name.decode('latin1').lower()
+            key = UNPREFIXED.get(name) or (
+                'HTTP_' + name.upper().replace('-', '_'))
+            value = value.decode('latin1')
+            if key in environ:
+                separator = '; ' if key == 'HTTP_COOKIE' else ','
+                value = environ[key] + separator + value
+            environ[key] = value
+        if 'CONTENT_LENGTH' not in environ:
+            # Chunked-запросы и HTTP/2 приходят без content-length, а тело
+            # уже прочитано целиком: без длины Django счёл бы его пустым.
+            body.seek(0, io.SEEK_END)
+            environ['CONTENT_LENGTH'] = str(body.tell())
+            body.seek(0)
+        return environ
+
+
+def get_asgi_application():
+    django.setup(set_prefix=False)
+    return ASGIHandler()
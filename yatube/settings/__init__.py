@@ -0,0 +1,17 @@
+'''
+Профиль настроек выбирается переменной окружения YATUBE_PROFILE:
+development (по умолчанию), test или production. Профиль можно указать и
+напрямую: DJANGO_SETTINGS_MODULE=yatube.settings.prod.
+'''
+import os
+
+PROFILE = os.environ.get('YATUBE_PROFILE', 'development')
+
+if PROFILE == 'production':
+    from .prod import *  # noqa: F401,F403
+elif PROFILE == 'test':
+    from .test import *  # noqa: F401,F403
+elif PROFILE == 'development':
+    from .dev import *  # noqa: F401,F403
+else:
+    raise ValueError(f'Unknown YATUBE_PROFILE: {PROFILE}')
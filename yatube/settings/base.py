@@ -0,0 +1,346 @@
+'''
+Django settings for yatube project: the part shared by all profiles.
+
+Generated by 'django-admin startproject' using Django 2.2.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/2.2/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/2.2/ref/settings/
+'''
+
+import os
+
+# Build paths inside the project like this: os.path.join(BASE_DIR, ...)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = 'yq*#to14tauib@95dex98ts!g^smxzo!4e&9mly&=$u*s=24%c'
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = True
+
+ALLOWED_HOSTS = [
+    "localhost",
+    "127.0.0.1",
+    "[::1]",
+    "testserver",
+]
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'about',
+    'users',
+    'posts.apps.PostsConfig',
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'sorl.thumbnail',
+]
+
+MIDDLEWARE = [
+    'posts.middleware.RequestMetricsMiddleware',
+    'posts.middleware.ReplicaPinMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'yatube.urls'
+
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+
+# Кэширующий загрузчик разбирает шаблон один раз на процесс, а не на
+# каждый {% include %}; TEMPLATE_WARMUP компилирует templates/ при старте.
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+def template_config(cached):
+    options = {
+        'context_processors': [
+            'django.template.context_processors.debug',
+            'django.template.context_processors.request',
+            'django.contrib.auth.context_processors.auth',
+            'django.contrib.messages.context_processors.messages',
+        ],
+    }
+    if cached:
+        options['loaders'] = [
+            ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+        ]
+    return [
+        {
+            'BACKEND': 'posts.metrics.TimedDjangoTemplates',
+            'NAME': 'django',
+            'DIRS': [TEMPLATES_DIR],
+            'APP_DIRS': not cached,
+            'OPTIONS': options,
+        },
+    ]
+
+
+TEMPLATE_CACHE = False
+TEMPLATE_WARMUP = False
+TEMPLATES = template_config(TEMPLATE_CACHE)
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/2.2/ref/settings/#databases
+
+# yatube.sqlite3 — стандартный бэкенд SQLite, который выполняет
+# OPTIONS['pragmas'] на каждом новом соединении и открывает транзакции
+# через BEGIN IMMEDIATE. WAL позволяет читать во время записи,
+# synchronous=NORMAL в режиме WAL безопасен для целостности базы;
+# busy_timeout — сколько миллисекунд писатель ждёт блокировку.
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+}
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'yatube.sqlite3',
+        'NAME': os.environ.get('YATUBE_DB_PATH',
+                               os.path.join(BASE_DIR, 'db.sqlite3')),
+        'OPTIONS': {
+            'pragmas': SQLITE_PRAGMAS,
+            'transaction_mode': 'IMMEDIATE',
+        },
+    }
+}
+
+
+def replica_databases(default):
+    """Реплика из YATUBE_REPLICA_PATH — копия основной базы (например,
+    от litestream) с её настройками, открытая только на чтение."""
+    path = os.environ.get('YATUBE_REPLICA_PATH')
+    if not path:
+        return {}
+    options = default.get('OPTIONS', {})
+    return {'replica': {
+        **default,
+        'NAME': path,
+        'OPTIONS': {**options, 'pragmas': {
+            **options.get('pragmas', {}), 'query_only': 1}},
+    }}
+
+
+DATABASES.update(replica_databases(DATABASES['default']))
+
+# Ленты и профили читаются с реплик, всё остальное — с default.
+# После записи клиент REPLICA_PIN_SECONDS читает только default, чтобы
+# видеть свои изменения, пока реплика догоняет. Столько же ленты,
+# прочитанные с реплики после записи, не попадают в кэш фрагментов.
+
+DATABASE_ROUTERS = ['posts.routers.ReplicaRouter']
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+REPLICA_PIN_SECONDS = 10
+
+REPLICA_PIN_COOKIE = 'pin_primary'
+
+
+# Password validation
+# https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/2.2/topics/i18n/
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/2.2/howto/static-files/
+
+STATIC_URL = '/static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Login
+
+LOGIN_URL = "/auth/login/"
+LOGIN_REDIRECT_URL = "index"
+
+
+EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
+
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
+
+# Cache
+# locmem — отдельный кэш в каждом процессе, годится только для разработки.
+# file и redis общие для всех воркеров; redis требует пакет django-redis.
+
+CACHE_BACKEND = os.environ.get('YATUBE_CACHE_BACKEND', 'locmem')
+
+CACHE_DIR = os.environ.get('YATUBE_CACHE_DIR',
+                           os.path.join(BASE_DIR, 'cache'))
+
+REDIS_URL = os.environ.get('YATUBE_REDIS_URL', 'redis://127.0.0.1:6379/0')
+
+CACHE_ALIASES = ('default', 'pages', 'fragments', 'counters', 'sessions')
+
+
+def cache_config(backend, alias):
+    if backend == 'locmem':
+        return {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': alias,
+        }
+    if backend == 'file':
+        return {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(CACHE_DIR, alias),
+        }
+    if backend == 'redis':
+        return {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': alias,
+        }
+    raise ValueError(f'Unknown YATUBE_CACHE_BACKEND: {backend}')
+
+
+CACHES = {alias: cache_config(CACHE_BACKEND, alias) for alias in CACHE_ALIASES}
+
+CACHE_MIDDLEWARE_ALIAS = 'pages'
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+SESSION_CACHE_ALIAS = 'sessions'
+
+# Follow timeline
+
+TIMELINE_FANOUT_MAX_FOLLOWERS = 10000
+
+TIMELINE_BACKFILL_LIMIT = 500
+
+# Comment threads: ответы глубже прикрепляются к предку на этом уровне.
+
+COMMENT_MAX_DEPTH = 4
+
+# Feed cache
+
+FEED_CACHE_ALIAS = 'fragments'
+
+FEED_COUNTERS_ALIAS = 'counters'
+
+FEED_CACHE_TIMEOUTS = {
+    'index': 300,
+    'group': 300,
+    'profile': 300,
+    'follow': 60,
+}
+
+# Search: 'auto' выбирает FTS5 на SQLite и инвертированный индекс иначе.
+
+SEARCH_BACKEND = 'auto'
+
+# Thumbnails
+
+THUMBNAIL_PRESETS = {
+    'feed': {'geometry': '960x339', 'crop': 'center', 'upscale': True},
+    'small': {'geometry': '320x113', 'crop': 'center', 'upscale': True},
+}
+
+# Фоновые задачи (posts.queue). Без TASKS_EAGER их выполняет
+# manage.py run_worker; TASK_SCHEDULE — периодические задачи и их период
+# в секундах.
+
+TASKS_EAGER = True
+
+TASK_RETRY_DELAY = 10
+
+TASK_LOCK_TIMEOUT = 600
+
+TASK_RETENTION = 7 * 24 * 3600
+
+TASK_SCHEDULE = {
+    'stats.reconcile': 24 * 3600,
+    'queue.purge': 3600,
+    'notifications.digest': 300,
+}
+
+# Уведомления о новых постах: письмо-дайджест уходит, когда самое старое
+# неотправленное уведомление ждёт NOTIFICATION_DIGEST_WINDOW секунд.
+
+NOTIFICATION_DIGEST_WINDOW = 3600
+
+NOTIFICATION_DIGEST_MAX_POSTS = 20
+
+NOTIFICATION_BATCH_SIZE = 500
+
+# Адрес сайта для ссылок в письмах.
+
+SITE_URL = os.environ.get('YATUBE_SITE_URL', 'http://localhost:8000')
+
+# Потоки, в которых yatube.asgi выполняет представления.
+
+ASGI_THREADS = int(os.environ.get('YATUBE_ASGI_THREADS', 8))
+
+# Загружаемые картинки уменьшаются до IMAGE_MAX_SIZE и пережимаются
+# в IMAGE_FORMAT (WEBP или JPEG) без EXIF.
+
+IMAGE_MAX_SIZE = (1920, 1920)
+IMAGE_FORMAT = 'WEBP'
+IMAGE_QUALITY = 82
+
+# Сколько секунд общие кэши могут отдавать анонимные HTML-страницы без
+# перепроверки; 0 — всегда перепроверять по ETag.
+
+HTML_CACHE_MAX_AGE = 0
+
+# Метрики запросов: /metrics открыт персоналу и по заголовку
+# Authorization: Bearer <METRICS_TOKEN>; запросы дольше SLOW_REQUEST_MS
+# пишутся в лог posts.slow_requests со списком SQL.
+
+METRICS_TOKEN = os.environ.get('YATUBE_METRICS_TOKEN', '')
+SLOW_REQUEST_MS = 500
@@ -0,0 +1,5 @@
+from .base import *  # noqa: F401,F403
+
+PROFILE = 'development'
+
+DEBUG = True
@@ -0,0 +1,73 @@
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa: F401,F403
+from .base import (BASE_DIR, CACHE_ALIASES, MIDDLEWARE, SQLITE_PRAGMAS,
+                   cache_config, replica_databases, template_config)
+
+PROFILE = 'production'
+
+DEBUG = False
+
+try:
+    SECRET_KEY = os.environ['YATUBE_SECRET_KEY']
+except KeyError:
+    raise ImproperlyConfigured('Set YATUBE_SECRET_KEY for production')
+
+ALLOWED_HOSTS = os.environ.get('YATUBE_ALLOWED_HOSTS',
+                               'localhost').split(',')
+
+# Соединение с базой живёт между запросами, а не открывается на каждый.
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'yatube.sqlite3',
+        'NAME': os.environ.get('YATUBE_DB_PATH',
+                               os.path.join(BASE_DIR, 'db.sqlite3')),
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {
+            'pragmas': {
+                **SQLITE_PRAGMAS,
+                'busy_timeout': 20000,
+                'cache_size': -20000,
+                'temp_store': 'MEMORY',
+                'mmap_size': 134217728,
+            },
+            'transaction_mode': 'IMMEDIATE',
+        },
+    }
+}
+
+DATABASES.update(replica_databases(DATABASES['default']))
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+TEMPLATE_CACHE = True
+TEMPLATE_WARMUP = True
+TEMPLATES = template_config(TEMPLATE_CACHE)
+
+# Кэш общий для всех воркеров: файловый, если не выбран redis.
+
+CACHE_BACKEND = os.environ.get('YATUBE_CACHE_BACKEND', 'file')
+
+CACHES = {alias: cache_config(CACHE_BACKEND, alias) for alias in CACHE_ALIASES}
+
+# С redis сессии живут только в кэше; файловый кэш может потеряться,
+# поэтому с ним сессии пишутся и в базу.
+
+SESSION_ENGINE = ('django.contrib.sessions.backends.cache'
+                  if CACHE_BACKEND == 'redis'
+                  else 'django.contrib.sessions.backends.cached_db')
+
+MIDDLEWARE = [
+    MIDDLEWARE[0],
+    'django.middleware.gzip.GZipMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
+    *MIDDLEWARE[1:],
+]
+
+# Миниатюры, раздача постов в ленты и уведомления выполняет
+# manage.py run_worker.
+
+TASKS_EAGER = False
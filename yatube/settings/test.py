@@ -0,0 +1,39 @@
+from .base import *  # noqa: F401,F403
+from .base import CACHE_ALIASES, cache_config
+
+PROFILE = 'test'
+
+DEBUG = False
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'yatube.sqlite3',
+        'NAME': ':memory:',
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+        },
+    },
+    # Зеркало default: тесты маршрутизации включают её через
+    # override_settings(DATABASE_REPLICAS=['replica']). Общий кэш SQLite
+    # в памяти блокирует таблицы, read_uncommitted снимает блокировку
+    # чтения, иначе реплика не увидит данные открытой транзакции теста.
+    'replica': {
+        'ENGINE': 'yatube.sqlite3',
+        'NAME': ':memory:',
+        'OPTIONS': {
+            'pragmas': {'read_uncommitted': 1},
+        },
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+
+DATABASE_REPLICAS = []
+
+# Хэширование паролей в тестах не должно стоить сотни миллисекунд.
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+CACHES = {alias: cache_config('locmem', alias) for alias in CACHE_ALIASES}
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+ASGI_THREADS = 0
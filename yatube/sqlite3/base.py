@@ -0,0 +1,52 @@
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+PRAGMA_NAME = re.compile(r'^[a-z_]+$')
+PRAGMA_VALUE = re.compile(r'^-?\w+$')
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite, который выполняет PRAGMA из OPTIONS['pragmas'] на каждом
+    новом соединении: synchronous, cache_size и большинство других
+    настроек действуют только на текущее соединение.
+
+    OPTIONS['transaction_mode'] = 'IMMEDIATE' открывает atomic() через
+    BEGIN IMMEDIATE. Обычная отложенная транзакция начинает со снимка на
+    чтение и при первой записи пытается поднять блокировку; если кто-то
+    уже записал, SQLite сразу отвечает «database is locked», не дожидаясь
+    busy_timeout. IMMEDIATE берёт блокировку записи в начале и честно
+    ждёт своей очереди.
+    """
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        params.pop('transaction_mode', None)
+        return params
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode')
+        if mode is None:
+            return super()._start_transaction_under_autocommit()
+        if mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f'Invalid SQLite transaction mode: {mode}')
+        self.cursor().execute(f'BEGIN {mode}')
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in self.pragmas().items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def pragmas(self):
+        pragmas = self.settings_dict['OPTIONS'].get('pragmas', {})
+        for name, value in pragmas.items():
+            if not PRAGMA_NAME.match(name) or not PRAGMA_VALUE.match(
+                    str(value)):
+                raise ImproperlyConfigured(
+                    f'Invalid SQLite pragma: {name} = {value}')
+        return pragmas